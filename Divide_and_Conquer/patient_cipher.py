@@ -0,0 +1,1063 @@
+"""Patient record cipher, storage and batch tools without any UI dependency.
+
+Settings come from environment variables only; the Gradio app in
+divide_conquer.py loads .env first and then calls load_settings().
+
+    python patient_cipher.py --encrypt-file report.pdf report.pdf.enc
+    python patient_cipher.py --batch-decrypt encrypted_data/store --output records.parquet
+"""
+
+import argparse
+import base64
+import bisect
+import codecs
+import csv
+import glob
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+
+def load_settings():
+    """Read the settings from environment variables."""
+    global min_chunk_size, fixed_security_level, stream_block_size, record_format
+    global record_store_dir, record_segment_bytes
+    global decrypt_cache_bytes, decrypt_cache_dir, decrypt_cache_disk_bytes, _decrypt_cache
+    global shift_cache_bytes
+    min_chunk_size = int(os.getenv('MIN_CHUNK_SIZE', 5))  # Default to 5 if not set
+    fixed_security_level = int(os.getenv('FIXED_SECURITY_LEVEL', 3))  # Default to 3 if not set
+    stream_block_size = int(os.getenv('STREAM_BLOCK_SIZE', 1 << 20))  # Characters per streamed block
+    record_format = os.getenv('RECORD_FORMAT', 'base85')  # base85 or legacy
+    record_store_dir = os.getenv('RECORD_STORE_DIR', 'encrypted_data/store')  # Opened on first save
+    record_segment_bytes = int(os.getenv('RECORD_SEGMENT_BYTES', 64 << 20))  # Roll segments over at this size
+    decrypt_cache_bytes = int(os.getenv('DECRYPT_CACHE_BYTES', 32 << 20))  # In-memory cache of decrypted records
+    decrypt_cache_dir = os.getenv('DECRYPT_CACHE_DIR')  # Optional on-disk tier; stores plaintext, off by default
+    decrypt_cache_disk_bytes = int(os.getenv('DECRYPT_CACHE_DISK_BYTES', 256 << 20))
+    shift_cache_bytes = int(os.getenv('SHIFT_CACHE_BYTES', 16 << 20))  # Cached cipher shift vectors
+    # Rebuilt with the new limits on next use
+    _decrypt_cache = None
+
+load_settings()
+
+def encrypt_chunk(chunk, shift):
+    return ''.join(chr((ord(c) + shift) % 256) for c in chunk)
+
+def decrypt_chunk(chunk, shift):
+    return ''.join(chr((ord(c) - shift) % 256) for c in chunk)
+
+def get_shift(index):
+    return 3 + index
+
+def recursive_encrypt(message, depth, index=0, min_chunk=None):
+    """Reference cipher: the original recursion, kept to check the fast path against."""
+    min_chunk = min_chunk or min_chunk_size
+    if len(message) <= min_chunk:
+        for i in range(depth - 1):
+            shift = get_shift(index)
+            message = encrypt_chunk(message, shift)
+        return encrypt_chunk(message, shift)
+    
+    mid = max(len(message) // 2, min_chunk)
+    left = recursive_encrypt(message[:mid], depth, index, min_chunk)
+    right = recursive_encrypt(message[mid:], depth, index + 1, min_chunk)
+    return left + right
+
+def recursive_decrypt(message, depth, index=0, min_chunk=None):
+    """Reference inverse of recursive_encrypt."""
+    min_chunk = min_chunk or min_chunk_size
+    if len(message) <= min_chunk:
+        for i in range(depth - 1):
+            shift = get_shift(index)
+            message = decrypt_chunk(message, shift)
+        return decrypt_chunk(message, shift)
+    
+    mid = max(len(message) // 2, min_chunk)
+    left = recursive_decrypt(message[:mid], depth, index, min_chunk)
+    right = recursive_decrypt(message[mid:], depth, index + 1, min_chunk)
+    return left + right
+
+@lru_cache(maxsize=64)
+def plan_segments(length, min_chunk):
+    """Split point of every distinct segment length the cipher visits.
+    
+    The halving only ever produces two lengths per level, so the plan is a
+    short list of (length, mid) pairs in ascending order, with mid None for
+    leaves, built iteratively rather than by recursing over the message.
+    """
+    plan = {}
+    pending = [length]
+    while pending:
+        size = pending.pop()
+        if size in plan:
+            continue
+        if size <= min_chunk:
+            plan[size] = None
+            continue
+        mid = max(size // 2, min_chunk)
+        plan[size] = mid
+        pending += [mid, size - mid]
+    return sorted(plan.items())
+
+_shift_vectors = OrderedDict()
+_shift_vectors_bytes = 0
+_shift_vectors_lock = threading.Lock()
+
+def shift_vector(length, min_chunk, depth):
+    """Per-byte shift of a whole message at shift index 0.
+    
+    Recent vectors are kept up to shift_cache_bytes in total, so a huge
+    message is not pinned in memory after it has been ciphered.
+    """
+    global _shift_vectors_bytes
+    key = (length, min_chunk, depth)
+    with _shift_vectors_lock:
+        vector = _shift_vectors.get(key)
+        if vector is not None:
+            _shift_vectors.move_to_end(key)
+            return vector
+    
+    vector = build_shift_vector(length, min_chunk, depth)
+    if length <= shift_cache_bytes:
+        with _shift_vectors_lock:
+            if key not in _shift_vectors:
+                _shift_vectors[key] = vector
+                _shift_vectors_bytes += length
+                while _shift_vectors_bytes > shift_cache_bytes:
+                    _, evicted = _shift_vectors.popitem(last=False)
+                    _shift_vectors_bytes -= len(evicted)
+    return vector
+
+def build_shift_vector(length, min_chunk, depth):
+    """Build the vector for shift_vector from plan_segments.
+    
+    A leaf's `depth` repeated shifts collapse into one of depth * shift, and
+    a right half is its left-aligned plan shifted by `depth` more, so each
+    distinct length is built once from the two below it.
+    """
+    vectors = {}
+    for size, mid in plan_segments(length, min_chunk):
+        if mid is None:
+            vectors[size] = np.full(size, depth * get_shift(0) % 256, dtype=np.uint8)
+        else:
+            vectors[size] = np.concatenate((vectors[mid], vectors[size - mid] + np.uint8(depth % 256)))
+    vector = vectors[length]
+    vector.flags.writeable = False
+    return vector
+
+def to_cipher_bytes(message):
+    """One byte per character of `message`, holding its code point mod 256.
+    
+    The chunk ciphers reduce every character mod 256, so this loses nothing
+    they would have kept.
+    """
+    try:
+        return bytearray(message.encode('latin-1'))
+    except UnicodeEncodeError:
+        code_points = np.frombuffer(message.encode('utf-32-le'), dtype=np.uint32)
+        return bytearray((code_points % 256).astype(np.uint8).tobytes())
+
+def cipher_in_place(buffer, depth, sign, index=0, min_chunk=None):
+    """Shift a bytearray in place; uint8 arithmetic wraps mod 256 for free."""
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    shifts = shift_vector(len(buffer), min_chunk or min_chunk_size, depth)
+    offset = np.uint8(sign * index * depth % 256)
+    if sign > 0:
+        data += shifts
+        data += offset
+    else:
+        data -= shifts
+        data += offset
+    return buffer
+
+def divide_and_conquer_encrypt(message, depth, index=0):
+    return cipher_in_place(to_cipher_bytes(message), depth, 1, index).decode('latin-1')
+
+def divide_and_conquer_decrypt(message, depth, index=0):
+    return cipher_in_place(to_cipher_bytes(message), depth, -1, index).decode('latin-1')
+
+def block_shifts(length, start, stop, depth, index=0):
+    """Shifts of positions [start, stop) of a `length`-character message.
+    
+    Only the O(log n) segments straddling the block edges are split further;
+    segments inside the block reuse their cached shift_vector, so memory
+    stays proportional to the block rather than the message.
+    """
+    shifts = np.empty(stop - start, dtype=np.uint8)
+    stack = [(0, length, index)]
+    while stack:
+        seg_start, size, seg_index = stack.pop()
+        seg_end = seg_start + size
+        if seg_end <= start or seg_start >= stop:
+            continue
+        if (start <= seg_start and seg_end <= stop) or size <= min_chunk_size:
+            lo, hi = max(seg_start, start), min(seg_end, stop)
+            shifts[lo - start:hi - start] = shift_vector(size, min_chunk_size, depth)[lo - seg_start:hi - seg_start]
+            shifts[lo - start:hi - start] += np.uint8(seg_index * depth % 256)
+            continue
+        mid = max(size // 2, min_chunk_size)
+        stack.append((seg_start, mid, seg_index))
+        stack.append((seg_start + mid, size - mid, seg_index + 1))
+    return shifts
+
+def map_file(f):
+    """Read-only memory map of an open file, or b'' for an empty one."""
+    if os.fstat(f.fileno()).st_size == 0:
+        return b''
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def iter_base64_decoded(data, block_size):
+    """Decode base64 from a bytes-like object one block at a time."""
+    pending = b''
+    for start in range(0, len(data), block_size):
+        pending += b''.join(data[start:start + block_size].split())
+        usable = len(pending) - len(pending) % 4
+        if usable:
+            yield base64.b64decode(pending[:usable])
+            pending = pending[usable:]
+    if pending:
+        yield base64.b64decode(pending)
+
+def encrypt_file(source, destination, depth=None, block_size=None):
+    """Stream-encrypt a file of any size into the saved base64 format.
+    
+    Each byte of `source` is one character of the message, so the result
+    is what encrypt_message's cipher and base64 steps give for the file
+    read as latin-1. Memory use is bounded by `block_size`.
+    """
+    depth = fixed_security_level if depth is None else depth
+    block_size = block_size or stream_block_size
+    
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        data = map_file(src)
+        length = len(data)
+        pending = b''
+        for start in range(0, length, block_size):
+            stop = min(start + block_size, length)
+            block = np.frombuffer(bytearray(data[start:stop]), dtype=np.uint8)
+            block += block_shifts(length, start, stop, depth)
+            # Ciphertext above 127 is UTF-8 encoded before base64, as in encrypt_message
+            pending += block.tobytes().decode('latin-1').encode('utf-8')
+            usable = len(pending) - len(pending) % 3
+            dst.write(base64.b64encode(pending[:usable]))
+            pending = pending[usable:]
+        dst.write(base64.b64encode(pending))
+    return destination
+
+def decrypt_file(source, destination, depth=None, block_size=None):
+    """Stream-decrypt a base64 record or attachment back to its raw bytes.
+    
+    The cipher's segments depend on the message length in characters, which
+    the UTF-8 layer hides, so a first pass counts characters and a second
+    one decrypts. Memory use is bounded by `block_size`.
+    """
+    depth = fixed_security_level if depth is None else depth
+    block_size = block_size or stream_block_size
+    
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        data = map_file(src)
+        # Every UTF-8 byte that is not a continuation byte starts a character
+        length = sum(
+            int(np.count_nonzero(np.frombuffer(chunk, dtype=np.uint8) & 0xC0 != 0x80))
+            for chunk in iter_base64_decoded(data, block_size)
+        )
+        
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        position = 0
+        for chunk in iter_base64_decoded(data, block_size):
+            text = decoder.decode(chunk)
+            block = np.frombuffer(to_cipher_bytes(text), dtype=np.uint8)
+            block -= block_shifts(length, position, position + len(block), depth)
+            dst.write(block.tobytes())
+            position += len(block)
+        decoder.decode(b'', final=True)
+    return destination
+
+def encrypt_uploaded_file(file):
+    if file is None:
+        return None, "Please choose a file to encrypt"
+    
+    os.makedirs('encrypted_data', exist_ok=True)
+    # A directory per upload, so same-named uploads keep their own output
+    destination = os.path.join(tempfile.mkdtemp(prefix='upload_', dir='encrypted_data'), os.path.basename(file) + '.enc')
+    try:
+        encrypt_file(file, destination)
+        return destination, f"Encrypted file saved to {destination}"
+    except Exception as e:
+        return None, f"Error encrypting file: {str(e)}"
+
+def decrypt_uploaded_file(file):
+    if file is None:
+        return None, "Please choose a file to decrypt"
+    
+    name = os.path.basename(file)
+    name = name[:-len('.enc')] if name.endswith('.enc') else name + '.dec'
+    destination = os.path.join(tempfile.mkdtemp(), name)
+    try:
+        decrypt_file(file, destination)
+        return destination, f"Decrypted {os.path.getsize(destination)} bytes"
+    except Exception as e:
+        return None, f"Error decrypting file: {str(e)}"
+
+# Binary records: a header naming the format version, security level and chunk
+# size, then the cipher applied to the UTF-8 bytes of the message. Unlike the
+# legacy format nothing is reduced mod 256 or UTF-8 expanded after the cipher.
+RECORD_MAGIC = b'\x89DCR'
+# Version 2 payloads escape ';' and '\\' inside values; version 1 are legacy text
+RECORD_VERSION = 2
+RECORD_HEADER = struct.Struct('>4sBHI')
+# Base85 of the magic contains '|', which never appears in legacy base64
+RECORD_TEXT_PREFIX = base64.b85encode(RECORD_MAGIC).decode('ascii')
+
+def pack_record(data, depth=None, min_chunk=None):
+    """Encrypt bytes into a binary record."""
+    depth = fixed_security_level if depth is None else depth
+    min_chunk = min_chunk or min_chunk_size
+    record = bytearray(RECORD_HEADER.size + len(data))
+    RECORD_HEADER.pack_into(record, 0, RECORD_MAGIC, RECORD_VERSION, depth, min_chunk)
+    record[RECORD_HEADER.size:] = data
+    cipher_in_place(memoryview(record)[RECORD_HEADER.size:], depth, 1, min_chunk=min_chunk)
+    return bytes(record)
+
+def unpack_record(record):
+    """Decrypt a binary record back to its bytes, using the levels in its header."""
+    if len(record) < RECORD_HEADER.size:
+        raise ValueError("Truncated record header")
+    magic, version, depth, min_chunk = RECORD_HEADER.unpack_from(record)
+    if magic != RECORD_MAGIC:
+        raise ValueError("Not an encrypted patient record")
+    if version not in (1, RECORD_VERSION):
+        raise ValueError(f"Unsupported record version {version}")
+    payload = bytearray(record[RECORD_HEADER.size:])
+    return bytes(cipher_in_place(payload, depth, -1, min_chunk=min_chunk))
+
+def decode_record(encrypted):
+    """Plaintext of a raw or base85 binary record, or of a legacy base64 one,
+    and whether its values are escaped."""
+    if isinstance(encrypted, str):
+        encrypted = encrypted.strip()
+        if encrypted.startswith(RECORD_TEXT_PREFIX):
+            encrypted = base64.b85decode(encrypted)
+        else:
+            decoded_message = base64.b64decode(encrypted).decode('utf-8')
+            return divide_and_conquer_decrypt(decoded_message, fixed_security_level), False
+    elif not encrypted.startswith(RECORD_MAGIC):
+        return decode_record(encrypted.decode('utf-8'))
+    escaped = RECORD_HEADER.unpack_from(encrypted)[1] >= 2
+    return unpack_record(encrypted).decode('utf-8'), escaped
+
+RECORD_FIELDS = (
+    'Name', 'Age', 'Gender', 'Address', 'Phone', 'Emergency Contact',
+    'Insurance', 'Medical History', 'Diagnosis'
+)
+PatientRecord = namedtuple('PatientRecord', [
+    'name', 'age', 'gender', 'address', 'phone', 'emergency_contact',
+    'insurance', 'medical_history', 'diagnosis'
+])
+
+# Both parsers match the whole schema in one pass. Escaped values run to the
+# next unescaped ';'; legacy values can hold a raw ';' or ':', so each one
+# runs to the next "; <Label>: " instead.
+ESCAPED_RECORD = re.compile(
+    '; '.join(rf'{re.escape(label)}: ((?:[^;\\]|\\.)*)' for label in RECORD_FIELDS), re.DOTALL
+)
+LEGACY_RECORD = re.compile(
+    '; '.join(f'{re.escape(label)}: (.*?)' for label in RECORD_FIELDS), re.DOTALL
+)
+UNESCAPE = re.compile(r'\\(.)', re.DOTALL)
+
+def serialize_record(record, escaped=True):
+    """Record text as encrypt_message has always laid it out."""
+    values = map(str, record)
+    if escaped:
+        values = (value.replace('\\', '\\\\').replace(';', '\\;') for value in values)
+    return '; '.join(f'{label}: {value}' for label, value in zip(RECORD_FIELDS, values))
+
+def parse_record(text, escaped=True):
+    """PatientRecord from record text, or None if it does not fit the schema."""
+    if escaped:
+        match = ESCAPED_RECORD.fullmatch(text)
+        if match is None:
+            return None
+        return PatientRecord._make(
+            UNESCAPE.sub(r'\1', value) if '\\' in value else value for value in match.groups()
+        )
+    
+    match = LEGACY_RECORD.fullmatch(text)
+    if match is None:
+        return None
+    return PatientRecord._make(value.strip() for value in match.groups())
+
+def records_to_columns(records):
+    """Field name -> object array of values, for a list of PatientRecords."""
+    if not records:
+        return {field: np.empty(0, dtype=object) for field in PatientRecord._fields}
+    return {
+        field: np.array(values, dtype=object)
+        for field, values in zip(PatientRecord._fields, zip(*records))
+    }
+
+def encrypt_message(patient_name, age, gender, address, phone, emergency_contact, insurance, medical_history, diagnosis):
+    if not patient_name or not diagnosis:
+        return "Please fill in all required fields"
+    
+    record = PatientRecord(
+        patient_name, age, gender, address, phone, emergency_contact,
+        insurance, medical_history, diagnosis
+    )
+    
+    if record_format == 'legacy':
+        combined_message = serialize_record(record, escaped=False)
+        encrypted_message = divide_and_conquer_encrypt(combined_message, fixed_security_level)
+        return base64.b64encode(encrypted_message.encode('utf-8')).decode('utf-8')
+    
+    # Binary records still travel through the UI as base85 text
+    packed = pack_record(serialize_record(record).encode('utf-8'))
+    return base64.b85encode(packed).decode('ascii')
+
+class RecordStore:
+    """Append-only log of encrypted records, split into size-capped segments.
+    
+    Each record is framed by its length, ID, timestamp and CRC32. An index
+    file of fixed-size entries maps record IDs to a segment and offset, so a
+    read is one dict lookup and one pread. Concurrent appends share fsyncs
+    (group commit), and a torn tail left by a crash is dropped on open.
+    A read-only store only reads, so it can be opened next to a live writer.
+    """
+    
+    FRAME = struct.Struct('>IQdI')
+    INDEX_ENTRY = struct.Struct('>QdIQI')
+    
+    def __init__(self, directory, segment_bytes=64 << 20, read_only=False):
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.read_only = read_only
+        self.segment_bytes = segment_bytes
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.offsets = {}
+        self.timestamps = []
+        self.readers = {}
+        self.next_id = 1
+        self.written = 0
+        self.synced = 0
+        self.last_entry = None
+        
+        index_path = os.path.join(directory, 'index.bin')
+        if read_only:
+            self.index_file = open(index_path, 'rb') if os.path.exists(index_path) else io.BytesIO()
+        else:
+            self.index_file = open(index_path, 'a+b')
+        self._load_index()
+        self._recover()
+        self.segment_file = None if read_only else open(self._segment_path(self.segment), 'ab')
+        self.segment_size = 0 if read_only else self.segment_file.tell()
+    
+    def __len__(self):
+        return len(self.offsets)
+    
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f'segment_{segment:06d}.log')
+    
+    def _add(self, record_id, timestamp, segment, offset, length):
+        self.offsets[record_id] = (segment, offset, length)
+        bisect.insort(self.timestamps, (timestamp, record_id))
+        self.next_id = max(self.next_id, record_id + 1)
+    
+    def _load_index(self):
+        self.index_file.seek(0)
+        data = self.index_file.read()
+        usable = len(data) - len(data) % self.INDEX_ENTRY.size
+        sizes = {}
+        for entry in self.INDEX_ENTRY.iter_unpack(data[:usable]):
+            record_id, timestamp, segment, offset, length = entry
+            if segment not in sizes:
+                path = self._segment_path(segment)
+                sizes[segment] = os.path.getsize(path) if os.path.exists(path) else 0
+            # Entries can outlive their record if the log was not synced
+            if offset + self.FRAME.size + length > sizes[segment]:
+                break
+            self._add(*entry)
+            self.last_entry = entry
+        if not self.read_only:
+            self.index_file.truncate(len(self.offsets) * self.INDEX_ENTRY.size)
+            self.index_file.seek(0, os.SEEK_END)
+    
+    def _recover(self):
+        segments = sorted(
+            int(name[len('segment_'):-len('.log')]) for name in os.listdir(self.directory)
+            if name.startswith('segment_') and name.endswith('.log')
+        ) or [1]
+        if self.offsets:
+            _, _, segment, offset, length = self.last_entry
+            start_segment, start_offset = segment, offset + self.FRAME.size + length
+        else:
+            start_segment, start_offset = segments[0], 0
+        
+        # Re-index anything written after the last index entry
+        for segment in segments:
+            if segment < start_segment or not os.path.exists(self._segment_path(segment)):
+                continue
+            offset = start_offset if segment == start_segment else 0
+            with open(self._segment_path(segment), 'rb' if self.read_only else 'r+b') as f:
+                f.seek(offset)
+                while True:
+                    header = f.read(self.FRAME.size)
+                    if len(header) < self.FRAME.size:
+                        break
+                    length, record_id, timestamp, crc = self.FRAME.unpack(header)
+                    data = f.read(length)
+                    if len(data) < length or zlib.crc32(data) != crc:
+                        break
+                    self._add(record_id, timestamp, segment, offset, length)
+                    if not self.read_only:
+                        self.index_file.write(self.INDEX_ENTRY.pack(record_id, timestamp, segment, offset, length))
+                    offset += self.FRAME.size + length
+                if not self.read_only:
+                    f.truncate(offset)
+        if not self.read_only:
+            self.index_file.flush()
+        self.segment = segments[-1]
+    
+    def append(self, data, timestamp=None, durable=True):
+        """Append one record and return its ID; durable waits for the fsync."""
+        if self.read_only:
+            raise ValueError("Record store is read-only")
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            if self.segment_size and self.segment_size + self.FRAME.size + len(data) > self.segment_bytes:
+                self._roll()
+            record_id = self.next_id
+            offset = self.segment_size
+            self.segment_file.write(self.FRAME.pack(len(data), record_id, timestamp, zlib.crc32(data)))
+            self.segment_file.write(data)
+            self.segment_file.flush()
+            self.index_file.write(self.INDEX_ENTRY.pack(record_id, timestamp, self.segment, offset, len(data)))
+            self.index_file.flush()
+            self.segment_size += self.FRAME.size + len(data)
+            self._add(record_id, timestamp, self.segment, offset, len(data))
+            self.written += 1
+            ticket = self.written
+        if durable:
+            self.sync(ticket)
+        return record_id
+    
+    def _roll(self):
+        os.fsync(self.segment_file.fileno())
+        self.segment_file.close()
+        self.segment += 1
+        self.segment_file = open(self._segment_path(self.segment), 'ab')
+        self.segment_size = 0
+    
+    def sync(self, ticket=None):
+        """fsync everything appended so far, unless another caller already has."""
+        with self.sync_lock:
+            if ticket is not None and self.synced >= ticket:
+                return
+            with self.lock:
+                target = self.written
+                descriptors = [os.dup(self.segment_file.fileno()), os.dup(self.index_file.fileno())]
+            try:
+                # Log before index, so a synced index never points past the log
+                for descriptor in descriptors:
+                    os.fsync(descriptor)
+            finally:
+                for descriptor in descriptors:
+                    os.close(descriptor)
+            self.synced = target
+    
+    def get(self, record_id):
+        """Bytes of one record."""
+        segment, offset, length = self.offsets[record_id]
+        reader = self.readers.get(segment)
+        if reader is None:
+            reader = self.readers[segment] = os.open(self._segment_path(segment), os.O_RDONLY)
+        frame = os.pread(reader, self.FRAME.size + length, offset)
+        _, _, _, crc = self.FRAME.unpack_from(frame)
+        data = frame[self.FRAME.size:]
+        if zlib.crc32(data) != crc:
+            raise ValueError(f"Record {record_id} is corrupt")
+        return data
+    
+    def between(self, start, end):
+        """IDs of records timestamped within [start, end], oldest first."""
+        lo = bisect.bisect_left(self.timestamps, (start,))
+        hi = bisect.bisect_right(self.timestamps, (end, float('inf')))
+        return [record_id for _, record_id in self.timestamps[lo:hi]]
+    
+    def ids(self):
+        return sorted(self.offsets)
+    
+    def close(self):
+        if not self.read_only:
+            self.sync()
+            self.segment_file.close()
+        self.index_file.close()
+        for reader in self.readers.values():
+            os.close(reader)
+        self.readers.clear()
+
+_record_store = None
+_record_store_lock = threading.Lock()
+
+def record_store():
+    """The store save_encrypted_data appends to, opened on first use."""
+    global _record_store
+    with _record_store_lock:
+        if _record_store is None:
+            _record_store = RecordStore(record_store_dir, record_segment_bytes)
+        return _record_store
+
+def record_bytes(encrypted_message):
+    """Bytes to store for an encrypted message: raw for binary records."""
+    if encrypted_message.startswith(RECORD_TEXT_PREFIX):
+        return base64.b85decode(encrypted_message)
+    return encrypted_message.encode('utf-8')
+
+def record_text(content):
+    """Text form of stored or uploaded record bytes, as shown in the UI."""
+    if content.startswith(RECORD_MAGIC):
+        return base64.b85encode(content).decode('ascii')
+    return content.decode('utf-8')
+
+def save_encrypted_data(encrypted_message):
+    if not encrypted_message or encrypted_message == "Please fill in all required fields":
+        return "No data to save"
+    
+    try:
+        record_id = record_store().append(record_bytes(encrypted_message.strip()))
+        return f"Data saved successfully as record {record_id} in {record_store_dir}"
+    except Exception as e:
+        return f"Error saving file: {str(e)}"
+
+def migrate_legacy_files(directory='encrypted_data', store=None, remove=False):
+    """Import one-file-per-record saves into the record store, oldest first.
+    
+    The SHA-256 of every imported file is listed in migrated.txt next to the
+    store, so running it again skips files already imported. Returns the
+    number of records added.
+    """
+    store = record_store() if store is None else store
+    paths = sorted(
+        glob.glob(os.path.join(directory, 'patient_data_*.txt')) +
+        glob.glob(os.path.join(directory, 'patient_data_*.bin'))
+    )
+    ledger = os.path.join(store.directory, 'migrated.txt')
+    try:
+        with open(ledger, 'r', encoding='utf-8') as f:
+            migrated = {line.split(' ', 1)[0] for line in f if line.strip()}
+    except FileNotFoundError:
+        migrated = set()
+    
+    imported = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        if digest in migrated:
+            continue
+        stamp = os.path.splitext(os.path.basename(path))[0][len('patient_data_'):]
+        try:
+            timestamp = datetime.strptime(stamp, "%Y%m%d_%H%M%S").timestamp()
+        except ValueError:
+            timestamp = os.path.getmtime(path)
+        if not content.startswith(RECORD_MAGIC):
+            content = record_bytes(content.decode('utf-8').strip())
+        store.append(content, timestamp=timestamp, durable=False)
+        migrated.add(digest)
+        imported.append((digest, path))
+    store.sync()
+    
+    # Written only once the records are durable, so a crash can not skip one
+    if imported:
+        with open(ledger, 'a', encoding='utf-8') as f:
+            f.writelines(f"{digest} {os.path.basename(path)}\n" for digest, path in imported)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    if remove:
+        for path in paths:
+            os.remove(path)
+    return len(imported)
+
+def load_stored_record(record_id):
+    if not record_id:
+        return ""
+    try:
+        return record_text(record_store().get(int(record_id)))
+    except KeyError:
+        return f"Error reading record: no record {int(record_id)}"
+    except Exception as e:
+        return f"Error reading record: {str(e)}"
+
+def read_uploaded_file(file):
+    """
+    Read the content of an uploaded file.
+    
+    Args:
+    file (dict): Gradio file upload dictionary
+    
+    Returns:
+    str: Content of the file
+    """
+    if file is None:
+        return ""
+    
+    try:
+        # Check if file is a dictionary from Gradio upload
+        if isinstance(file, dict):
+            file_path = file['name']
+        elif hasattr(file, 'name'):
+            # Handle temporary file wrapper
+            file_path = file.name
+        else:
+            # Direct file path
+            file_path = file
+        
+        # Read file content; raw binary records are shown as base85 text
+        with open(file_path, 'rb') as f:
+            return record_text(f.read())
+    except Exception as e:
+        return f"Error reading file: {str(e)}"
+
+def decrypt_message(encrypted_message):
+    if not encrypted_message:
+        return []
+
+    try:
+        
+        # Detect the record format, then decode and decrypt
+        decrypted_data, escaped = decode_record(encrypted_message)
+        
+        record = parse_record(decrypted_data, escaped)
+        if record is None:
+            # Text outside the schema still shows as "Field: value" pairs
+            fields = [field.strip() for field in decrypted_data.split(";") if field.strip()]
+            return [[key.strip(), value.strip()] for key, _, value in (field.partition(":") for field in fields)]
+        return [[label, value] for label, value in zip(RECORD_FIELDS, record)]
+    except Exception as e:
+        return [["Error", str(e)]]
+
+class DecryptCache:
+    """LRU cache of parsed records keyed by a hash of the ciphertext.
+    
+    The key also covers the security level and chunk size, so changing
+    either never serves a stale result. Entries are weighed by the bytes of
+    their text and the least recently used go first once `max_bytes` is
+    exceeded. With a `directory` a second tier of JSON files survives
+    restarts; it holds decrypted patient data, so it is off unless asked for.
+    """
+    
+    def __init__(self, max_bytes=None, directory=None, max_disk_bytes=None):
+        self.max_bytes = decrypt_cache_bytes if max_bytes is None else max_bytes
+        self.directory = directory
+        self.max_disk_bytes = decrypt_cache_disk_bytes if max_disk_bytes is None else max_disk_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # File sizes of the disk tier, least recently used first
+        self.disk_entries = OrderedDict()
+        self.disk_size = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load_disk()
+    
+    def key(self, encrypted_message):
+        if isinstance(encrypted_message, str):
+            encrypted_message = encrypted_message.strip().encode('utf-8')
+        digest = hashlib.sha256(encrypted_message)
+        digest.update(f":{fixed_security_level}:{min_chunk_size}".encode('ascii'))
+        return digest.hexdigest()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        
+        rows = self._read_disk(key)
+        with self.lock:
+            if rows is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, rows)
+        return rows
+    
+    def put(self, key, rows):
+        self._remember(key, rows)
+        try:
+            self._write_disk(key, rows)
+        except OSError:
+            # A full or unwritable disk tier only costs the persisted copy
+            pass
+    
+    def _remember(self, key, rows):
+        weight = sum(len(field.encode('utf-8')) + len(value.encode('utf-8')) for field, value in rows) + 100
+        if weight > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = (rows, weight)
+            self.size += weight
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+    
+    def _disk_path(self, key):
+        return os.path.join(self.directory, key + '.json')
+    
+    def _load_disk(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        for _, key, size in sorted(files):
+            self.disk_entries[key] = size
+            self.disk_size += size
+    
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        with self.lock:
+            if key not in self.disk_entries:
+                return None
+            self.disk_entries.move_to_end(key)
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                rows = json.load(f)
+            # The mtime keeps the recency order across restarts
+            os.utime(self._disk_path(key))
+            return rows
+        except (OSError, ValueError):
+            with self.lock:
+                self.disk_size -= self.disk_entries.pop(key, 0)
+            return None
+    
+    def _write_disk(self, key, rows):
+        if not self.directory:
+            return
+        path = self._disk_path(key)
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(rows, f)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        
+        # Trim the least recently used files once the tier is over its limit
+        evicted = []
+        with self.lock:
+            self.disk_size -= self.disk_entries.pop(key, 0)
+            self.disk_entries[key] = os.path.getsize(path)
+            self.disk_size += self.disk_entries[key]
+            while self.disk_size > self.max_disk_bytes and len(self.disk_entries) > 1:
+                old_key, size = self.disk_entries.popitem(last=False)
+                self.disk_size -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._disk_path(old_key))
+            except FileNotFoundError:
+                pass
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries), 'bytes': self.size,
+                'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses
+            }
+
+_decrypt_cache = None
+_decrypt_cache_lock = threading.Lock()
+
+def decrypt_cache():
+    """The cache behind cached_decrypt_message, created on first use."""
+    global _decrypt_cache
+    with _decrypt_cache_lock:
+        if _decrypt_cache is None:
+            _decrypt_cache = DecryptCache(directory=decrypt_cache_dir)
+        return _decrypt_cache
+
+def cached_decrypt_message(encrypted_message):
+    """decrypt_message through decrypt_cache(), plus a line of cache counters."""
+    if not encrypted_message:
+        return [], ""
+    
+    cache = decrypt_cache()
+    key = cache.key(encrypted_message)
+    rows = cache.get(key)
+    if rows is None:
+        rows = decrypt_message(encrypted_message)
+        # Failures are not cached, so a fixed configuration can retry them
+        if not (rows and rows[0][0] == "Error"):
+            cache.put(key, rows)
+    
+    stats = cache.stats()
+    summary = (f"Cache: {stats['hits']} hits, {stats['disk_hits']} disk hits, {stats['misses']} misses, "
+               f"{stats['entries']} records ({stats['bytes'] / 1024:.0f} KiB)")
+    return rows, summary
+
+def iter_archive(source, batch_size):
+    """Batches of (source, record key, record bytes) from a directory tree
+    of saved files; any directory in it holding an index.bin, including
+    `source` itself, is read as a record store."""
+    batch = []
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        if 'index.bin' in files:
+            # Segments are not saved files, so the store is read whole
+            dirs[:] = []
+            records = iter_store(root)
+        else:
+            records = iter_saved_files(root, sorted(files))
+        for record in records:
+            batch.append(record)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def iter_store(directory):
+    store = RecordStore(directory, read_only=True)
+    try:
+        for record_id in store.ids():
+            yield directory, record_id, store.get(record_id)
+    finally:
+        store.close()
+
+def iter_saved_files(directory, names):
+    for name in names:
+        if name.startswith('patient_data_'):
+            path = os.path.join(directory, name)
+            with open(path, 'rb') as f:
+                yield path, None, f.read()
+
+def init_batch_worker(security_level, chunk_size):
+    # Workers decrypt with the parent's settings, whatever their own .env says
+    global fixed_security_level, min_chunk_size
+    fixed_security_level, min_chunk_size = security_level, chunk_size
+
+EMPTY_RECORD = PatientRecord(*[''] * len(PatientRecord._fields))
+
+def decrypt_batch(batch):
+    """Output columns for a batch: source, record ID, schema fields, error."""
+    sources, record_ids, records, errors = [], [], [], []
+    for source, record_id, content in batch:
+        record, error = EMPTY_RECORD, ''
+        try:
+            record = parse_record(*decode_record(content))
+            if record is None:
+                record, error = EMPTY_RECORD, "Record does not match the patient schema"
+        except Exception as e:
+            error = str(e)
+        sources.append(source)
+        record_ids.append(record_id)
+        records.append(record)
+        errors.append(error)
+    
+    columns = {'Source': sources, 'Record ID': record_ids}
+    columns.update(zip(RECORD_FIELDS, records_to_columns(records).values()))
+    columns['Error'] = errors
+    return columns
+
+def batch_decrypt(source, output, workers=None, batch_size=500):
+    """Decrypt a whole archive into CSV or Parquet across a process pool.
+    
+    Batches are decrypted in parallel but written in archive order, with a
+    bounded number in flight so memory does not grow with the archive.
+    Returns the record count and the elapsed seconds.
+    """
+    columns = ['Source', 'Record ID', *RECORD_FIELDS, 'Error']
+    parquet = output.lower().endswith('.parquet')
+    if parquet:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = pa.schema([(column, pa.int64() if column == 'Record ID' else pa.string()) for column in columns])
+        writer = pq.ParquetWriter(output, schema)
+        write_columns = lambda batch: writer.write_table(pa.table(batch, schema=schema))
+    else:
+        out = open(output, 'w', newline='', encoding='utf-8')
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        write_columns = lambda batch: writer.writerows(zip(*batch.values()))
+    
+    start = time.perf_counter()
+    count = 0
+    workers = workers or os.cpu_count() or 1
+    try:
+        with ProcessPoolExecutor(workers, initializer=init_batch_worker,
+                                 initargs=(fixed_security_level, min_chunk_size)) as pool:
+            pending = deque()
+            for batch in iter_archive(source, batch_size):
+                pending.append(pool.submit(decrypt_batch, batch))
+                if len(pending) >= 2 * workers:
+                    batch = pending.popleft().result()
+                    write_columns(batch)
+                    count += len(batch['Source'])
+            while pending:
+                batch = pending.popleft().result()
+                write_columns(batch)
+                count += len(batch['Source'])
+    finally:
+        if parquet:
+            writer.close()
+        else:
+            out.close()
+    return count, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Patient record cipher and archive tools")
+    parser.add_argument("--encrypt-file", nargs=2, metavar=("SOURCE", "DESTINATION"),
+                        help="stream-encrypt a file into the saved base64 format")
+    parser.add_argument("--decrypt-file", nargs=2, metavar=("SOURCE", "DESTINATION"),
+                        help="stream-decrypt a file saved by --encrypt-file")
+    parser.add_argument("--migrate", nargs="?", const="encrypted_data", metavar="DIRECTORY",
+                        help="import patient_data_* files into the record store and exit")
+    parser.add_argument("--remove", action="store_true", help="delete the files once migrated")
+    parser.add_argument("--batch-decrypt", metavar="SOURCE",
+                        help="decrypt a directory of saved files or a record store and exit")
+    parser.add_argument("--output", default="decrypted_records.csv",
+                        help="CSV or .parquet file for --batch-decrypt")
+    parser.add_argument("--workers", type=int, help="worker processes for --batch-decrypt")
+    parser.add_argument("--batch-size", type=int, default=500, help="records per worker batch")
+    args = parser.parse_args(argv)
+    
+    if args.encrypt_file:
+        print(f"Encrypted file saved to {encrypt_file(*args.encrypt_file)}")
+    elif args.decrypt_file:
+        print(f"Decrypted file saved to {decrypt_file(*args.decrypt_file)}")
+    elif args.migrate:
+        count = migrate_legacy_files(args.migrate, remove=args.remove)
+        print(f"Migrated {count} records into {record_store_dir}")
+    elif args.batch_decrypt:
+        count, elapsed = batch_decrypt(args.batch_decrypt, args.output, args.workers, args.batch_size)
+        print(f"Decrypted {count} records into {args.output} in {elapsed:.2f}s "
+              f"({count / elapsed if elapsed else 0:.0f} records/s)")
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
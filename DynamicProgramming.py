@@ -1,71 +1,177 @@
 import sys
-from PyQt5 import QtCore, QtWidgets
 
-# List to store patient data
-patients = []
-patient_id_counter = 1  # Counter to assign unique IDs to each patient
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
 
+import patient_acceptance
+from patient_acceptance import (
+    IncrementalAcceptanceSolver,
+    PatientRegistry,
+    optimal_acceptance,
+)
 
-def add_patient(recovery, resources):
-    global patient_id_counter
+# Registry of the patients entered so far
+registry = PatientRegistry()
 
-    if recovery is None or resources is None:
-        return "Error: Recovery and Resources must not be empty.", patients
 
-    patient = {
-        "ID": patient_id_counter,
-        "Recovery": int(recovery),
-        "Resources": int(resources),
-    }
-    patients.append(patient)
+def add_patient(recovery, resources):
+    if recovery is None or resources is None:
+        return "Error: Recovery and Resources must not be empty.", registry
 
-    patient_id_counter += 1  # Increment the counter for the next patient
+    patient_id = registry.append(int(recovery), int(resources))
 
-    return f"Patient {patient['ID']} added! Total patients: {len(patients)}", patients
+    return f"Patient {patient_id} added! Total patients: {len(registry)}", registry
 
 
 def compute_optimal_acceptance(total_resources):
-    return optimal_acceptance(patients, int(total_resources))
-
-
-def optimal_acceptance(patient_data, total_resources):
-    try:
-        patient_recovery = [row["Recovery"] for row in patient_data]
-        patient_resources = [row["Resources"] for row in patient_data]
-    except KeyError:
-        return "Error: Invalid input format."
-
-    n = len(patient_recovery)
+    return optimal_acceptance(registry, int(total_resources))
 
-    dp = [[0] * (total_resources + 1) for _ in range(n + 1)]
 
-    for i in range(1, n + 1):
-        for resources in range(1, total_resources + 1):
-            if resources >= patient_resources[i - 1]:
-                dp[i][resources] = max(
-                    dp[i - 1][resources],
-                    dp[i - 1][resources - patient_resources[i - 1]]
-                    + patient_recovery[i - 1],
-                )
-            else:
-                dp[i][resources] = dp[i - 1][resources]
+class AcceptanceSignals(QtCore.QObject):
+    progress = QtCore.pyqtSignal(int, int)
+    finished = QtCore.pyqtSignal(int, str)
+    cancelled = QtCore.pyqtSignal(int)
 
-    accepted = []
-    resources = total_resources
-    for i in range(n, 0, -1):
-        if (
-            resources >= patient_resources[i - 1]
-            and dp[i][resources]
-            == dp[i - 1][resources - patient_resources[i - 1]] + patient_recovery[i - 1]
-        ):
-            accepted.append(f"Patient {i}")
-            resources -= patient_resources[i - 1]
 
-    accepted.reverse()
+class AcceptanceWorker(QtCore.QRunnable):
+    """Runs one solver query off the GUI thread."""
 
-    dp_matrix = "\n".join(["\t".join(map(str, row)) for row in dp])
-
-    return f"Accept patients: {', '.join(accepted)}\nTotal Recovery Score: {dp[n][total_resources]}\n\nDP Matrix:\n{dp_matrix}"
+    def __init__(self, solver, total_resources, include_matrix=False):
+        super().__init__()
+        self.solver = solver
+        self.total_resources = total_resources
+        self.include_matrix = include_matrix
+        self.cancel_requested = False
+        self.signals = AcceptanceSignals()
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def run(self):
+        report = self.solver.report(
+            self.total_resources,
+            include_matrix=self.include_matrix,
+            progress=self.signals.progress.emit,
+            cancelled=lambda: self.cancel_requested,
+        )
+        if report is None:
+            self.signals.cancelled.emit(self.total_resources)
+        else:
+            self.signals.finished.emit(self.total_resources, report)
+
+
+class PatientTableModel(QtCore.QAbstractTableModel):
+    """Qt view of a solver's PatientRegistry; adds and removes touch a single row."""
+
+    headers = ["ID", "Recovery", "Resources"]
+
+    def __init__(self, solver, parent=None):
+        super().__init__(parent)
+        self.solver = solver
+        self.registry = solver.registry
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.registry)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.DisplayRole:
+            return None
+        # The solver reads the registry from its worker thread
+        with self.solver.lock:
+            return str(self.registry.row(index.row())[index.column()])
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    def append_patient(self, recovery, resources):
+        row = len(self.registry)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        patient_id = self.solver.add_patient(recovery, resources)
+        self.endInsertRows()
+        return patient_id
+
+    def remove_patient(self, patient_id):
+        with self.solver.lock:
+            row = self.registry.index(patient_id)
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            self.solver.remove_patient(patient_id)
+            self.endRemoveRows()
+        return row
+
+    def load_csv(self, path):
+        self.beginResetModel()
+        try:
+            return self.solver.load_csv(path)
+        finally:
+            self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self.solver.reset()
+        self.endResetModel()
+
+
+class DPMatrixModel(QtCore.QAbstractTableModel):
+    """Read-only view of the solver's DP rows; cells are fetched on demand."""
+
+    def __init__(self, solver, parent=None):
+        super().__init__(parent)
+        self.solver = solver
+        self.row_count = 0
+        self.column_count = 0
+
+    def show_table(self, row_count, total_resources):
+        self.beginResetModel()
+        self.row_count = row_count
+        self.column_count = total_resources + 1
+        self.endResetModel()
+
+    def clear(self):
+        self.show_table(0, -1)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.row_count
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.column_count
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.DisplayRole:
+            return None
+        value = self.solver.cell(index.row(), index.column())
+        return None if value is None else str(value)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return str(section)
+        if not section:
+            return "None"
+        # Rows follow the registry order, so label them with its IDs
+        with self.solver.lock:
+            if section > len(self.solver.registry):
+                return None
+            return f"Patient {self.solver.registry.row(section - 1)[0]}"
+
+
+def dp_heatmap(solver, row_count, total_resources, max_size=256):
+    """Downsampled grayscale overview of the DP table; brighter is higher."""
+    cells = solver.sample(row_count, total_resources, max_size)
+    peak = cells.max()
+    if peak > 0:
+        cells = cells * 255 // peak
+    pixels = np.ascontiguousarray(cells, dtype=np.uint8)
+    height, width = pixels.shape
+    image = QtGui.QImage(
+        pixels.data, width, height, width, QtGui.QImage.Format_Grayscale8
+    )
+    return image.copy()
 
 
 class PatientAcceptanceApp(QtWidgets.QWidget):
@@ -76,10 +182,22 @@ class PatientAcceptanceApp(QtWidgets.QWidget):
         self.setGeometry(100, 100, 850, 1000)
         self.setStyleSheet("background-color: #f4f4f4; font-family: 'Arial';")
 
-        self.patients = []
+        self.showing_result = False
+        self.worker = None
+        self.pending_resources = None
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
 
         self.init_ui()
 
+        self.solver = IncrementalAcceptanceSolver(
+            self.total_resources_slider.maximum(), registry
+        )
+        self.patient_model = PatientTableModel(self.solver, self)
+        self.patient_table.setModel(self.patient_model)
+        self.matrix_model = DPMatrixModel(self.solver, self)
+        self.matrix_view.setModel(self.matrix_model)
+
     def init_ui(self):
         layout = QtWidgets.QVBoxLayout(self)
 
@@ -116,14 +234,22 @@ class PatientAcceptanceApp(QtWidgets.QWidget):
 
         # Add the "Patient List" section with the table
         self.patient_list_section = QtWidgets.QGroupBox("📋 Patient List")
-        self.patient_table = QtWidgets.QTableWidget()
-        self.patient_table.setColumnCount(3)
-        self.patient_table.setHorizontalHeaderLabels(["ID", "Recovery", "Resources"])
+        self.patient_table = QtWidgets.QTableView()
         self.patient_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         self.patient_table.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
 
+        self.import_button = QtWidgets.QPushButton("📂 Import CSV")
+        self.import_button.clicked.connect(self.import_patients)
+        self.export_button = QtWidgets.QPushButton("💾 Export CSV")
+        self.export_button.clicked.connect(self.export_patients)
+
+        csv_buttons_layout = QtWidgets.QHBoxLayout()
+        csv_buttons_layout.addWidget(self.import_button)
+        csv_buttons_layout.addWidget(self.export_button)
+
         patient_table_layout = QtWidgets.QVBoxLayout()
         patient_table_layout.addWidget(self.patient_table)
+        patient_table_layout.addLayout(csv_buttons_layout)
         self.patient_list_section.setLayout(patient_table_layout)
 
         # Add both sections to the top layout
@@ -141,6 +267,12 @@ class PatientAcceptanceApp(QtWidgets.QWidget):
         self.total_resources_slider.setValue(10)
         self.total_resources_slider.valueChanged.connect(self.update_slider_value)
 
+        # Rapid slider moves only trigger one calculation for the final value
+        self.slider_timer = QtCore.QTimer(self)
+        self.slider_timer.setSingleShot(True)
+        self.slider_timer.setInterval(150)
+        self.slider_timer.timeout.connect(self.compute_optimal_acceptance)
+
         self.slider_value_label = QtWidgets.QLabel(
             str(self.total_resources_slider.value())
         )
@@ -152,14 +284,43 @@ class PatientAcceptanceApp(QtWidgets.QWidget):
         )
         self.optimize_button.clicked.connect(self.compute_optimal_acceptance)
 
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setFormat("Processing patient %v of %m")
+        self.progress_bar.hide()
+
+        self.cancel_button = QtWidgets.QPushButton("⏹️ Cancel")
+        self.cancel_button.setStyleSheet(
+            "background-color: #FF9800; color: white; font-size: 18px; padding: 10px; border-radius: 5px;"
+        )
+        self.cancel_button.clicked.connect(self.cancel_optimal_acceptance)
+        self.cancel_button.hide()
+
         self.acceptance_output = QtWidgets.QTextEdit()
         self.acceptance_output.setReadOnly(True)
         self.acceptance_output.setStyleSheet("font-size: 18px; padding: 10px;")
 
+        # The DP table is shown through a lazy model; the text dump is opt-in
+        self.matrix_text_checkbox = QtWidgets.QCheckBox("Include DP matrix as text")
+        self.heatmap_checkbox = QtWidgets.QCheckBox("Show heatmap overview")
+        self.heatmap_checkbox.toggled.connect(self.update_heatmap)
+
+        self.matrix_view = QtWidgets.QTableView()
+        self.matrix_view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+
+        self.heatmap_label = QtWidgets.QLabel()
+        self.heatmap_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.heatmap_label.hide()
+
         self.acceptance_layout.addWidget(self.total_resources_slider)
         self.acceptance_layout.addWidget(self.slider_value_label)
         self.acceptance_layout.addWidget(self.optimize_button)
+        self.acceptance_layout.addWidget(self.progress_bar)
+        self.acceptance_layout.addWidget(self.cancel_button)
+        self.acceptance_layout.addWidget(self.matrix_text_checkbox)
+        self.acceptance_layout.addWidget(self.heatmap_checkbox)
         self.acceptance_layout.addWidget(self.acceptance_output)
+        self.acceptance_layout.addWidget(self.matrix_view)
+        self.acceptance_layout.addWidget(self.heatmap_label)
 
         layout.addWidget(self.acceptance_section)
 
@@ -187,52 +348,154 @@ class PatientAcceptanceApp(QtWidgets.QWidget):
             self.add_message.setText("Error: Values must be between 1 and 100.")
             return
 
-        status, updated_patients = add_patient(recovery, resources)
-        self.add_message.setText(status)
-
-        self.patients = updated_patients
-        self.update_patient_table()
+        patient_id = self.patient_model.append_patient(recovery, resources)
+        self.add_message.setText(
+            f"Patient {patient_id} added! Total patients: {len(registry)}"
+        )
 
         self.recovery_input.clear()
         self.resources_input.clear()
 
-    def update_patient_table(self):
-        self.patient_table.setRowCount(len(self.patients))
-        for i, patient in enumerate(self.patients):
-            self.patient_table.setItem(
-                i, 0, QtWidgets.QTableWidgetItem(str(patient["ID"]))
-            )
-            self.patient_table.setItem(
-                i, 1, QtWidgets.QTableWidgetItem(str(patient["Recovery"]))
-            )
-            self.patient_table.setItem(
-                i, 2, QtWidgets.QTableWidgetItem(str(patient["Resources"]))
-            )
+    def import_patients(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Import Patients", "", "CSV Files (*.csv)"
+        )
+        if not path:
+            return
+        try:
+            count = self.patient_model.load_csv(path)
+        except (OSError, ValueError) as e:
+            self.add_message.setText(f"Error: {e}")
+            return
+
+        self.add_message.setText(
+            f"Imported {count} patients! Total patients: {len(registry)}"
+        )
+
+    def export_patients(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export Patients", "patients.csv", "CSV Files (*.csv)"
+        )
+        if not path:
+            return
+        try:
+            with self.solver.lock:
+                registry.save_csv(path)
+        except OSError as e:
+            self.add_message.setText(f"Error: {e}")
+            return
+        self.add_message.setText(f"Exported {len(registry)} patients to {path}")
 
     def update_slider_value(self):
         self.slider_value_label.setText(str(self.total_resources_slider.value()))
 
+        # Answers for other capacities come straight from the cached rows
+        if self.showing_result:
+            self.slider_timer.start()
+
     def compute_optimal_acceptance(self):
         total_resources = self.total_resources_slider.value()
-        acceptance_recommendations = compute_optimal_acceptance(total_resources)
+        if self.worker is not None:
+            # Only the latest request runs once the current solve is done
+            self.pending_resources = total_resources
+            return
+        self.start_worker(total_resources)
+
+    def start_worker(self, total_resources):
+        self.worker = AcceptanceWorker(
+            self.solver, total_resources, self.matrix_text_checkbox.isChecked()
+        )
+        self.worker.signals.progress.connect(self.update_progress)
+        self.worker.signals.finished.connect(self.show_acceptance)
+        self.worker.signals.cancelled.connect(self.acceptance_cancelled)
+
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        self.cancel_button.show()
+        self.thread_pool.start(self.worker)
+
+    def update_progress(self, done, total):
+        if self.worker is not None and self.sender() is self.worker.signals:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(done)
+
+    def show_acceptance(self, total_resources, acceptance_recommendations):
+        if self.worker is None or self.sender() is not self.worker.signals:
+            return
+        self.finish_worker()
         self.acceptance_output.setPlainText(acceptance_recommendations)
+        self.matrix_model.show_table(len(self.solver.rows), total_resources)
+        self.showing_result = True
+        self.update_heatmap()
+
+        pending_resources, self.pending_resources = self.pending_resources, None
+        if pending_resources is not None and pending_resources != total_resources:
+            self.start_worker(pending_resources)
+
+    def update_heatmap(self):
+        if not self.heatmap_checkbox.isChecked() or not self.showing_result:
+            self.heatmap_label.hide()
+            return
+        image = dp_heatmap(
+            self.solver,
+            self.matrix_model.row_count,
+            self.matrix_model.column_count - 1,
+        )
+        self.heatmap_label.setPixmap(
+            QtGui.QPixmap.fromImage(image).scaled(
+                512, 256, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.FastTransformation
+            )
+        )
+        self.heatmap_label.show()
+
+    def acceptance_cancelled(self, total_resources):
+        if self.worker is None or self.sender() is not self.worker.signals:
+            return
+        self.finish_worker()
+        self.acceptance_output.setPlainText("Calculation cancelled.")
+
+    def cancel_optimal_acceptance(self):
+        self.pending_resources = None
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def finish_worker(self):
+        self.worker = None
+        self.progress_bar.hide()
+        self.cancel_button.hide()
+
+    def closeEvent(self, event):
+        self.cancel_optimal_acceptance()
+        self.thread_pool.waitForDone()
+        super().closeEvent(event)
 
     def reset_all(self):
-        global patient_id_counter, patients
-        patient_id_counter = 1
-        patients = []
-        self.patients = []
+        self.slider_timer.stop()
+        self.cancel_optimal_acceptance()
+        self.finish_worker()
+        self.showing_result = False
         self.add_message.setText("")
-        self.update_patient_table()
+        self.patient_model.clear()
         self.acceptance_output.clear()
+        self.matrix_model.clear()
+        self.update_heatmap()
         self.recovery_input.clear()
         self.resources_input.clear()
         self.total_resources_slider.setValue(10)
         self.slider_value_label.setText("10")
 
 
-if __name__ == "__main__":
-    app = QtWidgets.QApplication(sys.argv)
+def main():
+    # Any arguments run the headless CLI instead of the window
+    if len(sys.argv) > 1:
+        patient_acceptance.main()
+        return
+
+    app = QtWidgets.QApplication(sys.argv[:1])
     window = PatientAcceptanceApp()
     window.show()
     sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Requests per second of the drug selector under concurrent sessions.
+
+Every simulated client owns a session in ``greedy.sessions`` with its own
+formulary and fires ``calculate_selection`` requests back to back, the same
+path a Gradio event takes. Each catalog size and client count is run
+against the configured solver pool; the large catalog shows the cost of
+handing the formulary to the pool on every request.
+
+    python benchmarks/bench_greedy_load.py --clients 1 4 16 --pool process
+    python benchmarks/bench_greedy_load.py --drugs 200000 --greedy
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import greedy  # noqa: E402
+
+
+def make_session(seed, drugs):
+    # Same seed for every client so they all carry the same workload
+    rng = np.random.default_rng(seed)
+    token, selector = greedy.sessions.get(None)
+    if drugs <= 1000:
+        for i in range(drugs):
+            selector.add_drug(
+                f"drug{i}",
+                float(rng.uniform(1, 10)),
+                float(rng.uniform(1, 10)),
+                float(rng.uniform(1, 10)),
+                int(rng.integers(1, 20)),
+            )
+        return token
+    # add_drug renders the whole table each time, too slow for big formularies
+    values, quantities = rng.uniform(1, 10, (3, drugs)), rng.integers(1, 20, drugs)
+    with selector.lock:
+        for i in range(drugs):
+            selector.catalog.upsert(
+                f"drug{i}",
+                float(values[0, i]),
+                float(values[1, i]),
+                float(values[2, i]),
+                int(quantities[i]),
+            )
+    return token
+
+
+def client(token, requests, args):
+    for _ in range(requests):
+        _, selector = greedy.sessions.get(token)
+        selector.calculate_selection(
+            args.budget, args.side_effect_limit, args.target, args.exact, args.time_budget
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--drugs", type=int, nargs="+", default=[25, 200000])
+    parser.add_argument("--pool", choices=["process", "thread"], default=greedy.SOLVER_POOL)
+    parser.add_argument("--workers", type=int, default=greedy.SOLVER_WORKERS)
+    parser.add_argument("--budget", type=float, default=100)
+    parser.add_argument("--side-effect-limit", type=float, default=100)
+    parser.add_argument("--target", type=float, default=10**9)
+    parser.add_argument("--greedy", dest="exact", action="store_false")
+    parser.add_argument("--time-budget", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    greedy.SOLVER_POOL = args.pool
+    greedy.SOLVER_WORKERS = args.workers
+
+    print(f"pool={args.pool} workers={args.workers} exact={args.exact}")
+    for drugs in args.drugs:
+        tokens = [make_session(args.seed, drugs) for _ in range(max(args.clients))]
+
+        # Warm the pool up so worker start-up is not timed
+        client(tokens[0], 1, args)
+
+        for clients in args.clients:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients) as pool:
+                for _ in pool.map(lambda token: client(token, args.requests, args), tokens[:clients]):
+                    pass
+            elapsed = time.perf_counter() - start
+            total = clients * args.requests
+            print(f"drugs={drugs:>7}  clients={clients:>3}  requests={total:>5}  {total / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
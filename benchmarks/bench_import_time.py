@@ -0,0 +1,70 @@
+"""Import time of the headless algorithm modules against their UI front ends.
+
+Each module is imported in a fresh interpreter under ``-X importtime`` and the
+cumulative time of its top-level import is reported, best of ``--repeat`` runs.
+
+    python benchmarks/bench_import_time.py --repeat 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (module, UI module it was split from)
+MODULES = [
+    ("patient_acceptance", "DynamicProgramming"),
+    ("drug_selection", "greedy"),
+    ("patient_cipher", "divide_conquer"),
+]
+
+
+def import_seconds(module):
+    """Cumulative import time of ``module`` in a fresh interpreter."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [ROOT, os.path.join(ROOT, "Divide_and_Conquer"), env.get("PYTHONPATH", "")]
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=ROOT,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    for line in reversed(result.stderr.splitlines()):
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6
+    raise RuntimeError(f"no importtime entry for {module}")
+
+
+def best_of(module, repeat):
+    try:
+        return min(import_seconds(module) for _ in range(repeat))
+    except RuntimeError as error:
+        print(f"  {module}: {error}", file=sys.stderr)
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'core module':<20} {'seconds':>8}   {'UI module':<20} {'seconds':>8}")
+    for core, ui in MODULES:
+        core_time = best_of(core, args.repeat)
+        ui_time = best_of(ui, args.repeat)
+        print(
+            f"{core:<20} {core_time if core_time is not None else float('nan'):8.3f}"
+            f"   {ui:<20} {ui_time if ui_time is not None else float('nan'):8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
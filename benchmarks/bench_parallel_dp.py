@@ -0,0 +1,55 @@
+"""Speedup of the parallel acceptance engine against the worker count.
+
+Solves one large synthetic intake batch with the single-process NumPy engine
+and then with ``parallel_acceptance`` for each requested worker count.
+
+    python benchmarks/bench_parallel_dp.py --patients 2000 --resources 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from patient_acceptance import numpy_acceptance, parallel_acceptance  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--resources", type=int, default=200000)
+    parser.add_argument("--workers", type=int, nargs="+")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted(
+        {1, 2, 4, 8, 16, 32, cores} & set(range(1, cores + 1))
+    )
+
+    rng = np.random.default_rng(args.seed)
+    recovery = rng.integers(1, 101, args.patients).tolist()
+    resources = rng.integers(1, args.resources // 10 + 2, args.patients).tolist()
+
+    start = time.perf_counter()
+    expected = numpy_acceptance(recovery, resources, args.resources)
+    baseline = time.perf_counter() - start
+    print(f"{args.patients} patients, {args.resources} resources, {cores} cores")
+    print(f"numpy (1 process): {baseline:.2f}s")
+
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+    for count in workers:
+        start = time.perf_counter()
+        result = parallel_acceptance(recovery, resources, args.resources, count)
+        elapsed = time.perf_counter() - start
+        if result != expected:
+            sys.exit(f"Result mismatch with {count} workers")
+        print(f"{count:>8} {elapsed:>9.2f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
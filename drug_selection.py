@@ -0,0 +1,650 @@
+"""Drug selection solvers without any UI dependency.
+
+Only NumPy is needed to import this module; pandas and pyarrow are loaded
+when a formulary file or DataFrame is actually used.
+
+    python drug_selection.py formulary.csv --budget 100 --side-effect-limit 50 --target 200
+    python drug_selection.py formulary.csv --frontier budget --sweep-to 500 --side-effect-limit 50 --target 200
+"""
+
+import argparse
+import bisect
+import heapq
+import math
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+class Drug:
+    __slots__ = ('name', 'benefit_per_unit', 'cost_per_unit', 'side_effect_per_unit', 'max_quantity')
+    
+    def __init__(self, name, benefit_per_unit, cost_per_unit, side_effect_per_unit, max_quantity):
+        self.name = name
+        self.benefit_per_unit = benefit_per_unit
+        self.cost_per_unit = cost_per_unit
+        self.side_effect_per_unit = side_effect_per_unit
+        self.max_quantity = max_quantity
+
+class DrugCatalog:
+    """Drugs stored as preallocated NumPy columns, indexed by name.
+    
+    Columns double in capacity when full, so adding a drug is amortized O(1);
+    adding a name that is already present updates that drug in place.
+    `version` goes up on every change, so results can be cached against it.
+    """
+    
+    def __init__(self, capacity=16):
+        self.version = 0
+        self.size = 0
+        self.index = {}
+        self.names = np.empty(capacity, dtype=object)
+        self.benefit = np.empty(capacity, dtype=np.float64)
+        self.cost = np.empty(capacity, dtype=np.float64)
+        self.side_effect = np.empty(capacity, dtype=np.float64)
+        self.max_quantity = np.empty(capacity, dtype=np.int64)
+    
+    def __len__(self):
+        return self.size
+    
+    def reserve(self, extra):
+        needed = self.size + extra
+        if needed <= len(self.names):
+            return
+        capacity = max(needed, 2 * len(self.names))
+        for column in ('names', 'benefit', 'cost', 'side_effect', 'max_quantity'):
+            old = getattr(self, column)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+    
+    def upsert(self, name, benefit, cost, side_effect, max_quantity):
+        self.make_writable()
+        self.version += 1
+        row = self.index.get(name)
+        if row is None:
+            self.reserve(1)
+            row = self.size
+            self.index[name] = row
+            self.size += 1
+        self.names[row] = name
+        self.benefit[row] = benefit
+        self.cost[row] = cost
+        self.side_effect[row] = side_effect
+        self.max_quantity[row] = max_quantity
+        return row
+    
+    def drug(self, row):
+        return Drug(
+            name=self.names[row],
+            benefit_per_unit=float(self.benefit[row]),
+            cost_per_unit=float(self.cost[row]),
+            side_effect_per_unit=float(self.side_effect[row]),
+            max_quantity=int(self.max_quantity[row])
+        )
+    
+    def __iter__(self):
+        return (self.drug(row) for row in range(self.size))
+    
+    def columns(self):
+        """Views of the filled part of each column."""
+        n = self.size
+        return self.names[:n], self.benefit[:n], self.cost[:n], self.side_effect[:n], self.max_quantity[:n]
+    
+    def to_frame(self):
+        import pandas as pd
+        
+        names, benefit, cost, side_effect, max_quantity = self.columns()
+        # copy=False and an object Name column keep every column a view
+        return pd.DataFrame({
+            'Name': pd.Series(names, dtype=object, copy=False),
+            'Benefit': benefit,
+            'Cost': cost,
+            'Side Effect': side_effect,
+            'Max Quantity': max_quantity
+        }, copy=False)
+    
+    def clear(self):
+        version = self.version
+        self.__init__()
+        self.version = version + 1
+    
+    def snapshot(self):
+        """Compact, independent copy of the catalog, cheap to hand to a solver.
+        
+        Solvers never look names up, so the name index is left out and only
+        rebuilt if the copy is ever modified.
+        """
+        copy = DrugCatalog.__new__(DrugCatalog)
+        copy.version = self.version
+        copy.size = self.size
+        copy.index = None
+        for column, values in zip(('names', 'benefit', 'cost', 'side_effect', 'max_quantity'), self.columns()):
+            setattr(copy, column, values.copy())
+        return copy
+    
+    def make_writable(self):
+        if self.index is None:
+            self.index = {name: row for row, name in enumerate(self.names[:self.size].tolist())}
+        # Columns adopted from a memory-mapped file are read-only until copied
+        for column in ('names', 'benefit', 'cost', 'side_effect', 'max_quantity'):
+            values = getattr(self, column)
+            if not values.flags.writeable:
+                setattr(self, column, values.copy())
+    
+    def import_table(self, path):
+        """Upsert every drug in a CSV, Parquet or Arrow IPC file.
+        
+        Rows are validated in bulk; invalid ones are skipped and returned as
+        (row number, reason) pairs next to the number of drugs imported.
+        Names already in the catalog are updated instead of duplicated.
+        """
+        table = read_drug_table(path)
+        self.version += 1
+        names = table['Name']
+        benefit, cost, side_effect, max_quantity = (
+            numeric_column(table[column])
+            for column in ('Benefit', 'Cost', 'Side Effect', 'Max Quantity')
+        )
+        
+        with np.errstate(invalid='ignore'):
+            problems = [
+                (~np.array([isinstance(name, str) and name != '' for name in names], dtype=bool),
+                 'missing name'),
+                # The solvers assume positive per-unit amounts
+                (~np.isfinite(benefit) | (benefit <= 0), 'invalid benefit'),
+                (~np.isfinite(cost) | (cost <= 0), 'invalid cost'),
+                (~np.isfinite(side_effect) | (side_effect <= 0), 'invalid side effect'),
+                (~np.isfinite(max_quantity) | (max_quantity < 1) | (max_quantity != np.floor(max_quantity)),
+                 'invalid max quantity'),
+            ]
+        invalid = np.zeros(len(names), dtype=bool)
+        bad_rows = {}
+        for mask, reason in problems:
+            for row in np.flatnonzero(mask & ~invalid).tolist():
+                bad_rows[row + 1] = reason
+            invalid |= mask
+        bad_rows = sorted(bad_rows.items())
+        
+        valid = np.flatnonzero(~invalid)
+        # Later rows win when a file lists the same name twice
+        last_row = {names[row]: row for row in valid.tolist()}
+        if len(last_row) < len(valid):
+            valid = np.array(sorted(last_row.values()), dtype=np.int64)
+        
+        columns = (
+            np.asarray(names, dtype=object)[valid],
+            benefit[valid], cost[valid], side_effect[valid],
+            max_quantity[valid].astype(np.int64)
+        )
+        if self.size == 0 and len(valid) == len(names):
+            # Nothing to merge with: adopt the loaded columns without copying
+            self.names, self.benefit, self.cost, self.side_effect, self.max_quantity = (
+                np.asarray(names, dtype=object), benefit, cost, side_effect,
+                max_quantity.astype(np.int64, copy=False)
+            )
+            self.size = len(names)
+            self.index = {name: row for row, name in enumerate(self.names.tolist())}
+            return self.size, bad_rows
+        
+        self.make_writable()
+        rows = np.array([self.index.get(name, -1) for name in columns[0].tolist()], dtype=np.int64)
+        existing = rows >= 0
+        new = np.flatnonzero(~existing)
+        self.reserve(len(new))
+        for column, values in zip(('names', 'benefit', 'cost', 'side_effect', 'max_quantity'), columns):
+            target = getattr(self, column)
+            target[rows[existing]] = values[existing]
+            target[self.size:self.size + len(new)] = values[new]
+        for offset, name in enumerate(columns[0][new].tolist()):
+            self.index[name] = self.size + offset
+        self.size += len(new)
+        return len(valid), bad_rows
+    
+    def export_table(self, path):
+        """Write the catalog as CSV, Parquet or Arrow IPC, chosen by extension."""
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            self.to_frame().to_csv(path, index=False)
+            return path
+        
+        pa = import_pyarrow()
+        names, benefit, cost, side_effect, max_quantity = self.columns()
+        table = pa.table({
+            'Name': pa.array(names.tolist(), type=pa.string()),
+            'Benefit': benefit,
+            'Cost': cost,
+            'Side Effect': side_effect,
+            'Max Quantity': max_quantity
+        })
+        if extension == '.parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(table, path)
+        elif extension in ARROW_EXTENSIONS:
+            with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        else:
+            raise ValueError(f"Unsupported formulary format: {extension or path}")
+        return path
+
+DRUG_COLUMNS = ['Name', 'Benefit', 'Cost', 'Side Effect', 'Max Quantity']
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+DEFAULT_TIME_BUDGET = 2.0
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise ValueError("Parquet and Arrow formularies need the pyarrow package.")
+    return pyarrow
+
+def read_drug_table(path):
+    """Columns of a formulary file as a dict of NumPy arrays.
+    
+    Arrow IPC files are memory-mapped, so numeric columns without nulls are
+    views of the file rather than copies.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        import pandas as pd
+        
+        frame = pd.read_csv(path)
+        columns = {column: frame[column].to_numpy() for column in DRUG_COLUMNS if column in frame}
+    else:
+        pa = import_pyarrow()
+        if extension == '.parquet':
+            import pyarrow.parquet as pq
+            table = pq.read_table(path, memory_map=True)
+        elif extension in ARROW_EXTENSIONS:
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        else:
+            raise ValueError(f"Unsupported formulary format: {extension or path}")
+        columns = {
+            column: table.column(column).to_numpy()
+            for column in DRUG_COLUMNS if column in table.column_names
+        }
+    
+    missing = [column for column in DRUG_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"Formulary is missing columns: {', '.join(missing)}")
+    columns['Name'] = [name if isinstance(name, str) else None for name in columns['Name'].tolist()]
+    return columns
+
+def numeric_column(values):
+    """Float64 view of a column, with NaN wherever a value is not a number."""
+    values = np.asarray(values)
+    if values.dtype.kind in 'fiub':
+        return values.astype(np.float64, copy=False)
+    
+    import pandas as pd
+    
+    return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+def drug_columns(drugs):
+    """Name, benefit, cost, side-effect and max-quantity columns of ``drugs``."""
+    if isinstance(drugs, DrugCatalog):
+        return drugs.columns()
+    drugs = list(drugs)
+    return (
+        [drug.name for drug in drugs],
+        np.array([drug.benefit_per_unit for drug in drugs], dtype=np.float64),
+        np.array([drug.cost_per_unit for drug in drugs], dtype=np.float64),
+        np.array([drug.side_effect_per_unit for drug in drugs], dtype=np.float64),
+        np.array([drug.max_quantity for drug in drugs], dtype=np.int64)
+    )
+
+def max_units(total, per_unit, limit):
+    """Largest number of units that keeps total + units * per_unit <= limit."""
+    if per_unit <= 0 or math.isinf(limit):
+        return math.inf if total + per_unit <= limit else 0
+    
+    units = math.floor((limit - total) / per_unit)
+    # Nudge by one unit where floating-point rounding crossed the boundary
+    if total + units * per_unit > limit:
+        units -= 1
+    elif total + (units + 1) * per_unit <= limit:
+        units += 1
+    return max(units, 0)
+
+def greedy_drug_selection_with_target(drugs, budget, side_effect_limit, target_benefit):
+    names, benefit, cost, side_effect, max_quantity = drug_columns(drugs)
+    # Best benefit per cost first; a heap only orders the drugs actually
+    # reached before the target is met
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ranking = list(zip((-(benefit / cost)).tolist(), range(len(names))))
+    heapq.heapify(ranking)
+    # Nothing more fits once every limit's slack is below the smallest
+    # per-unit amount; a bound over all drugs covers the ones left too
+    least_cost = float(np.min(cost, initial=np.inf))
+    least_side_effect = float(np.min(side_effect, initial=np.inf))
+    least_benefit = float(np.min(benefit, initial=np.inf))
+    benefit, cost = benefit.tolist(), cost.tolist()
+    side_effect, max_quantity = side_effect.tolist(), max_quantity.tolist()
+    
+    selected_drugs = []
+    total_benefit = 0
+    total_cost = 0
+    total_side_effect = 0
+    
+    while ranking:
+        i = heapq.heappop(ranking)[1]
+        quantity = min(
+            max_quantity[i],
+            max_units(total_cost, cost[i], budget),
+            max_units(total_side_effect, side_effect[i], side_effect_limit),
+            max_units(total_benefit, benefit[i], target_benefit)
+        )
+        if quantity <= 0:
+            continue
+        
+        selected_drugs.append((names[i], quantity))
+        total_benefit += quantity * benefit[i]
+        total_cost += quantity * cost[i]
+        total_side_effect += quantity * side_effect[i]
+        
+        if (
+            total_benefit >= target_benefit
+            or (least_benefit > 0 and total_benefit + least_benefit > target_benefit)
+            or (least_cost > 0 and total_cost + least_cost > budget)
+            or (least_side_effect > 0 and total_side_effect + least_side_effect > side_effect_limit)
+        ):
+            break
+                
+    return selected_drugs, total_benefit, total_cost, total_side_effect
+
+def max_units_array(total, per_unit, limit):
+    """`max_units` for arrays of running totals and limits at once."""
+    if per_unit <= 0:
+        return np.where(total + per_unit <= limit, np.inf, 0.0)
+    
+    with np.errstate(invalid='ignore'):
+        units = np.floor((limit - total) / per_unit)
+        units -= total + units * per_unit > limit
+        units += total + (units + 1) * per_unit <= limit
+    return np.maximum(units, 0)
+
+class SelectionFrontier:
+    """Greedy totals at every point of a sorted budget or side-effect grid.
+    
+    `at(value)` answers grid values with a bisection. The greedy totals jump
+    between grid points, so any other value has to be solved afresh with
+    the limits from `limits(value)`.
+    """
+    
+    def __init__(self, axis, grid, benefit, cost, side_effect,
+                 budget=math.inf, side_effect_limit=math.inf, target_benefit=math.inf):
+        self.axis = axis
+        self.grid = grid
+        self.benefit = benefit
+        self.cost = cost
+        self.side_effect = side_effect
+        self.budget = budget
+        self.side_effect_limit = side_effect_limit
+        self.target_benefit = target_benefit
+    
+    def __len__(self):
+        return len(self.grid)
+    
+    def at(self, value):
+        """(grid value, benefit, cost, side effect), or None off the grid."""
+        point = bisect.bisect_left(self.grid, value)
+        if point == len(self.grid) or self.grid[point] != value:
+            return None
+        return (float(self.grid[point]), float(self.benefit[point]),
+                float(self.cost[point]), float(self.side_effect[point]))
+    
+    def limits(self, value):
+        """(budget, side-effect limit, target benefit) with `value` on the swept axis."""
+        if self.axis == 'budget':
+            return value, self.side_effect_limit, self.target_benefit
+        return self.budget, value, self.target_benefit
+    
+    def to_frame(self):
+        import pandas as pd
+        
+        label = 'Budget' if self.axis == 'budget' else 'Side Effect Limit'
+        return pd.DataFrame({
+            label: self.grid,
+            'Total Benefit': self.benefit,
+            'Total Cost': self.cost,
+            'Total Side Effect': self.side_effect
+        })
+
+def selection_frontier(drugs, axis, grid, budget, side_effect_limit, target_benefit):
+    """Greedy selection totals for every value of `grid` in a single sweep.
+    
+    `axis` is 'budget' or 'side_effect' and names the limit that `grid`
+    replaces; the other limit and the target stay fixed. The drugs are ranked
+    once and each one is applied to every grid point together, with the same
+    unit arithmetic as `greedy_drug_selection_with_target`.
+    """
+    if axis not in ('budget', 'side_effect'):
+        raise ValueError(f"Unknown frontier axis: {axis}")
+    names, benefit, cost, side_effect, max_quantity = drug_columns(drugs)
+    grid = np.sort(np.asarray(grid, dtype=np.float64))
+    # The swept limit is replaced by the grid, so it may be left as None
+    budget = grid if axis == 'budget' else float(budget)
+    side_effect_limit = grid if axis == 'side_effect' else float(side_effect_limit)
+    limits = (
+        math.inf if axis == 'budget' else budget,
+        math.inf if axis == 'side_effect' else side_effect_limit,
+        float(target_benefit)
+    )
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        order = np.argsort(-(benefit / cost), kind='stable')
+    total_benefit = np.zeros(len(grid))
+    total_cost = np.zeros(len(grid))
+    total_side_effect = np.zeros(len(grid))
+    done = np.zeros(len(grid), dtype=bool)
+    
+    for i in order.tolist():
+        quantity = np.minimum.reduce([
+            np.full(len(grid), float(max_quantity[i])),
+            max_units_array(total_cost, float(cost[i]), budget),
+            max_units_array(total_side_effect, float(side_effect[i]), side_effect_limit),
+            max_units_array(total_benefit, float(benefit[i]), target_benefit)
+        ])
+        quantity[done | ~(quantity > 0)] = 0
+        total_benefit += quantity * benefit[i]
+        total_cost += quantity * cost[i]
+        total_side_effect += quantity * side_effect[i]
+        done |= total_benefit == target_benefit
+        if done.all():
+            break
+    
+    return SelectionFrontier(axis, grid, total_benefit, total_cost, total_side_effect, *limits)
+
+def exact_drug_selection(drugs, budget, side_effect_limit, target_benefit, time_budget=None,
+                         greedy_result=None):
+    """Exact bounded selection under the budget, side-effect limit and target.
+    
+    Each drug's max_quantity is split into binary pieces (1, 2, 4, ..., rest)
+    so any quantity is a sum of distinct pieces, and a depth-first
+    branch-and-bound over the pieces maximizes total benefit. Nodes are pruned
+    by the tighter of the fractional bounds on budget and on side effects,
+    capped at the target; those bounds only hold for positive costs and side
+    effects, so any other drug raises ValueError. `greedy_result`, if the
+    caller already has it, seeds the search. Returns None if ``time_budget``
+    seconds run out.
+    """
+    started = time.perf_counter()
+    if not isinstance(drugs, DrugCatalog):
+        drugs = list(drugs)
+    names, drug_benefit, drug_cost, drug_side_effect, max_quantity = drug_columns(drugs)
+    if not (np.all(drug_cost > 0) and np.all(drug_side_effect > 0)):
+        raise ValueError("The exact search needs positive costs and side effects")
+    
+    pieces = []
+    for i in range(len(names)):
+        if drug_benefit[i] <= 0:
+            continue
+        remaining, size = int(max_quantity[i]), 1
+        while remaining > 0:
+            units = min(size, remaining)
+            pieces.append((i, units))
+            remaining -= units
+            size *= 2
+    
+    drug_index = np.array([i for i, _ in pieces], dtype=np.int64)
+    units = np.array([units for _, units in pieces], dtype=np.float64)
+    benefit = units * drug_benefit[drug_index]
+    cost = units * drug_cost[drug_index]
+    side_effect = units * drug_side_effect[drug_index]
+    
+    # Branch on the best benefit per cost first, like the greedy ranking
+    order = np.argsort(-benefit / np.maximum(cost, 1e-12), kind='stable')
+    drug_index, units = drug_index[order], units[order]
+    benefit, cost, side_effect = benefit[order], cost[order], side_effect[order]
+    by_side_effect = np.argsort(-benefit / np.maximum(side_effect, 1e-12), kind='stable')
+    
+    def fractional_bound(free, weights, room):
+        weights, values = weights[free], benefit[free]
+        filled = np.cumsum(weights)
+        whole = int(np.searchsorted(filled, room, 'right'))
+        bound = values[:whole].sum()
+        if whole < len(weights):
+            bound += values[whole] * (room - (filled[whole - 1] if whole else 0.0)) / weights[whole]
+        return bound
+    
+    def upper_bound(level, value, used_cost, used_side_effect):
+        by_cost = np.arange(level, len(benefit))
+        by_effect = by_side_effect[by_side_effect >= level]
+        return min(
+            target_benefit,
+            value + fractional_bound(by_cost, cost, budget - used_cost),
+            value + fractional_bound(by_effect, side_effect, side_effect_limit - used_side_effect)
+        )
+    
+    # The greedy answer is feasible, so only strictly better nodes are explored
+    if greedy_result is None:
+        greedy_result = greedy_drug_selection_with_target(drugs, budget, side_effect_limit, target_benefit)
+    best_value, best_taken = greedy_result[1], None
+    
+    stack = [(0, 0.0, 0.0, 0.0, 0)]
+    while stack:
+        if time_budget is not None and time.perf_counter() - started > time_budget:
+            return None
+        
+        level, value, used_cost, used_side_effect, taken = stack.pop()
+        if value > best_value:
+            best_value, best_taken = value, taken
+        if level == len(benefit) or best_value >= target_benefit:
+            continue
+        if upper_bound(level, value, used_cost, used_side_effect) <= best_value:
+            continue
+        
+        stack.append((level + 1, value, used_cost, used_side_effect, taken))
+        if (used_cost + cost[level] <= budget and
+            used_side_effect + side_effect[level] <= side_effect_limit and
+            value + benefit[level] <= target_benefit):
+            stack.append((level + 1, value + benefit[level], used_cost + cost[level],
+                          used_side_effect + side_effect[level], taken | 1 << level))
+    
+    if best_taken is None:
+        return greedy_result
+    
+    quantities = {}
+    for level in range(len(benefit)):
+        if best_taken >> level & 1:
+            i = int(drug_index[level])
+            quantities[i] = quantities.get(i, 0) + int(units[level])
+    
+    selected_drugs = [(names[i], quantity) for i, quantity in sorted(quantities.items())]
+    total_benefit = sum(quantity * float(drug_benefit[i]) for i, quantity in quantities.items())
+    total_cost = sum(quantity * float(drug_cost[i]) for i, quantity in quantities.items())
+    total_side_effect = sum(quantity * float(drug_side_effect[i]) for i, quantity in quantities.items())
+    return selected_drugs, total_benefit, total_cost, total_side_effect
+
+def solve_selection(catalog, budget, side_effect_limit, target_benefit, exact=False,
+                    time_budget=DEFAULT_TIME_BUDGET):
+    """Selection result and the name of the engine that produced it.
+    
+    The exact search is exponential, so a missing, non-positive or infinite
+    `time_budget` falls back to DEFAULT_TIME_BUDGET instead of no limit.
+    """
+    greedy_result = greedy_drug_selection_with_target(catalog, budget, side_effect_limit, target_benefit)
+    if not exact:
+        return greedy_result, "greedy"
+    
+    time_budget = float(time_budget) if time_budget is not None else math.nan
+    if not 0 < time_budget < math.inf:
+        time_budget = DEFAULT_TIME_BUDGET
+    try:
+        result = exact_drug_selection(
+            catalog, budget, side_effect_limit, target_benefit,
+            time_budget=time_budget, greedy_result=greedy_result
+        )
+    except ValueError:
+        return greedy_result, "greedy (exact search needs positive costs and side effects)"
+    if result is None:
+        return greedy_result, "greedy (exact search ran out of time)"
+    return result, "exact"
+
+# Catalogs this process was sent by a solver pool, by the caller's key
+_cached_catalogs = OrderedDict()
+CATALOG_CACHE_SIZE = 8
+
+def solve_cached(function, key, catalog, args):
+    """(True, function(catalog, *args)), keeping the catalog for later calls.
+    
+    Pool workers run this so a catalog crosses the process boundary once per
+    worker and `key`. With catalog=None the one kept under `key` is used, and
+    (False, None) means this process has not been sent it yet.
+    """
+    if catalog is None:
+        catalog = _cached_catalogs.get(key)
+        if catalog is None:
+            return False, None
+        _cached_catalogs.move_to_end(key)
+    else:
+        _cached_catalogs[key] = catalog
+        while len(_cached_catalogs) > CATALOG_CACHE_SIZE:
+            _cached_catalogs.popitem(last=False)
+    return True, function(catalog, *args)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Medical drug selection")
+    parser.add_argument('formulary', help="CSV, Parquet or Arrow file of drugs")
+    parser.add_argument('--budget', type=float, default=math.inf)
+    parser.add_argument('--side-effect-limit', type=float, default=math.inf)
+    parser.add_argument('--target', type=float, default=math.inf, help="target benefit")
+    parser.add_argument('--exact', action='store_true', help="use the exact optimizer")
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET)
+    parser.add_argument('--frontier', choices=['budget', 'side_effect'],
+                        help="sweep this limit instead of solving once")
+    parser.add_argument('--sweep-to', type=float, help="largest limit in the sweep")
+    parser.add_argument('--points', type=int, default=50)
+    args = parser.parse_args(argv)
+    
+    catalog = DrugCatalog()
+    imported, bad_rows = catalog.import_table(args.formulary)
+    for row, reason in bad_rows:
+        print(f"Skipped row {row}: {reason}")
+    
+    if args.frontier:
+        if args.sweep_to is None:
+            parser.error("--frontier needs --sweep-to")
+        grid = np.linspace(0, args.sweep_to, args.points)
+        frontier = selection_frontier(
+            catalog, args.frontier, grid, args.budget, args.side_effect_limit, args.target
+        )
+        print("Limit\tBenefit\tCost\tSide Effect")
+        for point in zip(frontier.grid, frontier.benefit, frontier.cost, frontier.side_effect):
+            print("\t".join(f"{value:.2f}" for value in point))
+        return
+    
+    (selected_drugs, total_benefit, total_cost, total_side_effect), engine = solve_selection(
+        catalog, args.budget, args.side_effect_limit, args.target, args.exact, args.time_budget
+    )
+    for name, quantity in selected_drugs:
+        print(f"{name}: {quantity} units")
+    print(f"Total Benefit: {total_benefit:.2f}")
+    print(f"Total Cost: {total_cost:.2f}")
+    print(f"Total Side Effect: {total_side_effect:.2f}")
+    print(f"Engine: {engine}")
+
+if __name__ == "__main__":
+    main()
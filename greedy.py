@@ -1,94 +1,124 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import gradio as gr
+import numpy as np
 import pandas as pd
 
-class Drug:
-    def __init__(self, name, benefit_per_unit, cost_per_unit, side_effect_per_unit, max_quantity):
-        self.name = name
-        self.benefit_per_unit = benefit_per_unit
-        self.cost_per_unit = cost_per_unit
-        self.side_effect_per_unit = side_effect_per_unit
-        self.max_quantity = max_quantity
-
-def greedy_drug_selection_with_target(drugs, budget, side_effect_limit, target_benefit):
-    drugs = sorted(drugs, key=lambda x: x.benefit_per_unit / x.cost_per_unit, reverse=True)
-    
-    selected_drugs = []
-    total_benefit = 0
-    total_cost = 0
-    total_side_effect = 0
-    
-    for drug in drugs:
-        for quantity in range(1, drug.max_quantity + 1):
-            if (total_cost + drug.cost_per_unit <= budget and 
-                total_side_effect + drug.side_effect_per_unit <= side_effect_limit and 
-                total_benefit + drug.benefit_per_unit <= target_benefit):
-                
-                selected_drugs.append((drug.name, quantity))
-                total_benefit += drug.benefit_per_unit
-                total_cost += drug.cost_per_unit
-                total_side_effect += drug.side_effect_per_unit
-                
-                if total_benefit == target_benefit:
-                    return selected_drugs, total_benefit, total_cost, total_side_effect
-            else:
-                break
-                
-    return selected_drugs, total_benefit, total_cost, total_side_effect
+from drug_selection import (
+    DEFAULT_TIME_BUDGET, DrugCatalog, greedy_drug_selection_with_target, selection_frontier,
+    solve_cached, solve_selection
+)
+# Kept importable from here for code written before the solvers moved out
+from drug_selection import Drug  # noqa: F401
+
+SOLVER_POOL = os.environ.get('GREEDY_SOLVER_POOL', 'process')
+SOLVER_WORKERS = int(os.environ.get('GREEDY_SOLVER_WORKERS', os.cpu_count() or 1))
+QUEUE_CONCURRENCY = int(os.environ.get('GREEDY_CONCURRENCY', max(SOLVER_WORKERS, 1)))
+MAX_SESSIONS = int(os.environ.get('GREEDY_MAX_SESSIONS', 256))
+SESSION_IDLE_SECONDS = float(os.environ.get('GREEDY_SESSION_IDLE_SECONDS', 3600))
+FRONTIER_CACHE_SIZE = 16
+
+_solver_executor = None
+_solver_lock = threading.Lock()
+
+def solver_executor():
+    """Shared bounded pool for solver calls, or None to solve inline.
+    
+    GREEDY_SOLVER_POOL picks 'process' (default, scales the pure-Python exact
+    search across cores) or 'thread' (no pickling, but solvers share the GIL);
+    GREEDY_SOLVER_WORKERS=0 disables it.
+    """
+    global _solver_executor
+    if SOLVER_WORKERS <= 0:
+        return None
+    with _solver_lock:
+        if _solver_executor is None:
+            pool = ThreadPoolExecutor if SOLVER_POOL == 'thread' else ProcessPoolExecutor
+            _solver_executor = pool(max_workers=SOLVER_WORKERS)
+        return _solver_executor
+
+def run_solver(function, key, catalog, *args):
+    """function(catalog, *args) on the solver pool.
+    
+    Threads share the catalog as is. Process workers keep the last few
+    catalogs they were sent, so only `key` is pickled until the catalog
+    changes; a worker that has not seen it yet costs one extra round trip.
+    """
+    executor = solver_executor()
+    if executor is None:
+        return function(catalog, *args)
+    if isinstance(executor, ThreadPoolExecutor):
+        return executor.submit(function, catalog, *args).result()
+    found, result = executor.submit(solve_cached, function, key, None, args).result()
+    if not found:
+        _, result = executor.submit(solve_cached, function, key, catalog, args).result()
+    return result
 
 class DrugSelector:
     def __init__(self):
-        self.drugs = []
+        self.catalog = DrugCatalog()
+        # Gradio runs events on worker threads, so one session can race itself
+        self.lock = threading.Lock()
+        self.frontiers = OrderedDict()
+        self.catalog_snapshot = None
+        self.key = uuid.uuid4().hex
+    
+    def snapshot(self):
+        """Solver copy of the catalog, reused until the catalog changes; hold self.lock."""
+        if self.catalog_snapshot is None or self.catalog_snapshot.version != self.catalog.version:
+            self.catalog_snapshot = self.catalog.snapshot()
+        return self.catalog_snapshot
         
     def add_drug(self, name, benefit, cost, side_effect, max_quantity):
         try:
             if not name or not benefit or not cost or not side_effect or not max_quantity:
                 return None
                 
-            drug = Drug(
-                name=name,
-                benefit_per_unit=float(benefit),
-                cost_per_unit=float(cost),
-                side_effect_per_unit=float(side_effect),
-                max_quantity=int(max_quantity)
+            benefit, cost, side_effect, max_quantity = (
+                float(benefit), float(cost), float(side_effect), int(max_quantity)
             )
-            self.drugs.append(drug)
+            # Same rule as import_table: the solvers assume positive amounts
+            if not all(0 < value < np.inf for value in (benefit, cost, side_effect, max_quantity)):
+                return None
             
-            # Create DataFrame of current drugs
-            drug_data = {
-                'Name': [d.name for d in self.drugs],
-                'Benefit': [d.benefit_per_unit for d in self.drugs],
-                'Cost': [d.cost_per_unit for d in self.drugs],
-                'Side Effect': [d.side_effect_per_unit for d in self.drugs],
-                'Max Quantity': [d.max_quantity for d in self.drugs]
-            }
-            df = pd.DataFrame(drug_data)
+            with self.lock:
+                self.catalog.upsert(name, benefit, cost, side_effect, max_quantity)
+                frame = self.catalog.to_frame()
             
-            return df, "", 0, 0, 0, 0
+            return frame, "", 0, 0, 0, 0
         except ValueError:
             return None
     
-    def calculate_selection(self, budget, side_effect_limit, target_benefit):
+    def calculate_selection(self, budget, side_effect_limit, target_benefit, exact=False,
+                            time_budget=DEFAULT_TIME_BUDGET):
         try:
             budget = float(budget)
             side_effect_limit = float(side_effect_limit)
             target_benefit = float(target_benefit)
             
-            if not self.drugs:
-                return "Please add some drugs first.", None
+            with self.lock:
+                if not len(self.catalog):
+                    return "Please add some drugs first.", None
+                catalog = self.snapshot()
             
-            selected_drugs, total_benefit, total_cost, total_side_effect = greedy_drug_selection_with_target(
-                self.drugs, budget, side_effect_limit, target_benefit
+            result, engine = run_solver(
+                solve_selection, (self.key, catalog.version), catalog,
+                budget, side_effect_limit, target_benefit, exact, time_budget
             )
+            selected_drugs, total_benefit, total_cost, total_side_effect = result
             
             # Create optimized summary with selected drugs
             if selected_drugs:
-                # Create a dictionary to combine quantities for same drugs
+                # Combine entries that share a drug name
                 drug_quantities = {}
                 for drug, qty in selected_drugs:
-                    if drug in drug_quantities:
-                        drug_quantities[drug] += qty
-                    else:
-                        drug_quantities[drug] = qty
+                    drug_quantities[drug] = drug_quantities.get(drug, 0) + qty
                 
                 # Create concise summary
                 drug_summary = "\n".join([
@@ -104,6 +134,7 @@ Summary:
 ✨ Total Benefit: {total_benefit:.2f}
 💰 Total Cost: {total_cost:.2f}
 ⚠️ Total Side Effect: {total_side_effect:.2f}
+🧮 Engine: {engine}
                 """
                 
                 # Create optimized DataFrame
@@ -115,112 +146,368 @@ Summary:
                 
                 return summary, results_df
             else:
-                return "No viable drug combination found.", None
+                return f"No viable drug combination found. (Engine: {engine})", None
                 
-        except ValueError:
+        except (TypeError, ValueError):
             return "Error: Please ensure all constraints are valid numbers.", None
 
+    def frontier(self, axis, sweep_to, points, budget, side_effect_limit, target_benefit):
+        """Frontier for the current catalog, memoized until the catalog changes."""
+        grid = np.linspace(0, float(sweep_to), int(points))
+        with self.lock:
+            budget = None if axis == 'budget' else float(budget)
+            side_effect_limit = None if axis == 'side_effect' else float(side_effect_limit)
+            key = (self.catalog.version, axis, float(sweep_to), int(points),
+                   budget, side_effect_limit, float(target_benefit))
+            frontier = self.frontiers.get(key)
+            if frontier is not None:
+                self.frontiers.move_to_end(key)
+                return frontier
+            catalog = self.snapshot()
+        
+        frontier = run_solver(
+            selection_frontier, (self.key, catalog.version), catalog,
+            axis, grid, budget, side_effect_limit, target_benefit
+        )
+        with self.lock:
+            self.frontiers[key] = frontier
+            while len(self.frontiers) > FRONTIER_CACHE_SIZE:
+                self.frontiers.popitem(last=False)
+        return frontier
+    
+    def calculate_frontier(self, axis, sweep_to, points, budget, side_effect_limit, target_benefit, lookup):
+        try:
+            if not len(self.catalog):
+                return "Please add some drugs first.", None, None
+            axis = 'budget' if axis == "Budget" else 'side_effect'
+            # Only the limit that is not swept has to be filled in
+            fixed_limit = side_effect_limit if axis == 'budget' else budget
+            if sweep_to is None or points is None or target_benefit is None or fixed_limit is None:
+                return "Error: Please fill in the sweep, the target and the limit that is not swept.", None, None
+            if int(points) < 2 or float(sweep_to) <= 0:
+                return "Error: Sweep at least two points up to a positive limit.", None, None
+            
+            frontier = self.frontier(axis, sweep_to, points, budget, side_effect_limit, target_benefit)
+            frame = frontier.to_frame()
+            plot = gr.LinePlot(frame, x=frame.columns[0], y='Total Benefit')
+            
+            point = None
+            if lookup is not None:
+                point = frontier.at(float(lookup))
+                if point is None:
+                    # Between grid points the plan can differ, so solve that limit
+                    with self.lock:
+                        catalog = self.snapshot()
+                    result = run_solver(
+                        greedy_drug_selection_with_target, (self.key, catalog.version), catalog,
+                        *frontier.limits(float(lookup))
+                    )
+                    point = (float(lookup),) + tuple(result[1:])
+            if point is None:
+                return f"Swept {len(frontier)} points.", plot, frame
+            value, total_benefit, total_cost, total_side_effect = point
+            summary = f"""
+Swept {len(frontier)} points.
+
+At {frame.columns[0]} {value:.2f}:
+✨ Total Benefit: {total_benefit:.2f}
+💰 Total Cost: {total_cost:.2f}
+⚠️ Total Side Effect: {total_side_effect:.2f}
+            """
+            return summary, plot, frame
+        
+        except (TypeError, ValueError):
+            return "Error: Please ensure all constraints are valid numbers.", None, None
+    
     def clear_drugs(self):
-        self.drugs = []
+        with self.lock:
+            self.catalog.clear()
         return None
+    
+    def import_drugs(self, file):
+        if file is None:
+            return self.catalog.to_frame(), "Please choose a formulary file."
+        
+        with self.lock:
+            try:
+                imported, bad_rows = self.catalog.import_table(file)
+            except (OSError, ValueError, KeyError) as e:
+                return self.catalog.to_frame(), f"Error importing formulary: {str(e)}"
+            frame = self.catalog.to_frame()
+        
+        status = f"Imported {imported} drugs. Catalog now has {len(frame)} drugs."
+        if bad_rows:
+            shown = "\n".join(f"Row {row}: {reason}" for row, reason in bad_rows[:20])
+            more = f"\n... and {len(bad_rows) - 20} more" if len(bad_rows) > 20 else ""
+            status += f"\nSkipped {len(bad_rows)} invalid rows:\n{shown}{more}"
+        return frame, status
+    
+    def export_drugs(self, file_format):
+        path = os.path.join(tempfile.mkdtemp(), f"formulary.{file_format}")
+        with self.lock:
+            catalog = self.snapshot()
+        try:
+            return catalog.export_table(path), f"Exported {len(catalog)} drugs."
+        except (OSError, ValueError) as e:
+            return None, f"Error exporting formulary: {str(e)}"
 
-# Create custom theme
-custom_theme = gr.themes.Soft(
-    primary_hue="blue",
-    secondary_hue="indigo",
-).set(
-    button_primary_background_fill="*primary_500",
-    button_primary_background_fill_hover="*primary_600",
-    button_secondary_background_fill="*secondary_500",
-    button_secondary_background_fill_hover="*secondary_600",
-)
+class SessionStore:
+    """One DrugSelector per browser session, evicted least-recently-used.
+    
+    Sessions idle for longer than `idle_seconds` are dropped, and the oldest
+    ones go first once more than `max_sessions` are live.
+    """
+    
+    def __init__(self, max_sessions=MAX_SESSIONS, idle_seconds=SESSION_IDLE_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self.sessions)
+    
+    def get(self, token):
+        """(token, selector) for a session, starting a fresh one if it is unknown or evicted."""
+        now = time.monotonic()
+        with self.lock:
+            # Entries are kept in last-used order, so expired ones sit at the front
+            while self.sessions and next(iter(self.sessions.values()))[1] < now - self.idle_seconds:
+                self.sessions.popitem(last=False)
+            
+            entry = self.sessions.pop(token, None) if token else None
+            if entry is None:
+                token, selector = uuid.uuid4().hex, DrugSelector()
+            else:
+                selector = entry[0]
+            self.sessions[token] = (selector, now)
+            
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        return token, selector
+
+def session_event(trigger, method, session, inputs=(), outputs=()):
+    """Wire `trigger` to a DrugSelector method on the caller's own session."""
+    def handler(token, *args):
+        token, selector = sessions.get(token)
+        result = method(selector, *args)
+        if len(outputs) == 1:
+            result = (result,)
+        elif result is None:
+            result = (gr.skip(),) * len(outputs)
+        return (*result, token)
+    
+    return trigger(handler, inputs=[session, *inputs], outputs=[*outputs, session])
+
+sessions = SessionStore()
 
-# Create the Gradio interface
-drug_selector = DrugSelector()
+def build_interface():
+    """Build the Gradio app; nothing is constructed until this is called."""
+    # Create custom theme
+    custom_theme = gr.themes.Soft(
+        primary_hue="blue",
+        secondary_hue="indigo",
+    ).set(
+        button_primary_background_fill="*primary_500",
+        button_primary_background_fill_hover="*primary_600",
+        button_secondary_background_fill="*secondary_500",
+        button_secondary_background_fill_hover="*secondary_600",
+    )
 
-with gr.Blocks(title="Medical Drug Selection", theme=custom_theme) as iface:
-    gr.Markdown("""
+    # Create the Gradio interface
+    with gr.Blocks(title="Medical Drug Selection", theme=custom_theme) as iface:
+        gr.Markdown("""
     # 💊 Medical Drug Selection System
     
     Optimize drug selection based on benefits, costs, and side effects.
     """)
     
-    with gr.Tab("📝 Add Drugs"):
-        with gr.Row():
-            with gr.Column(scale=1):
-                name_input = gr.Textbox(
-                    label="Drug Name",
-                    placeholder="Enter drug name",
-                )
-                benefit_input = gr.Number(
-                    label="Benefit per Unit"
-                )
-                cost_input = gr.Number(
-                    label="Cost per Unit"
-                )
-                side_effect_input = gr.Number(
-                    label="Side Effect per Unit"
-                )
-                max_quantity_input = gr.Number(
-                    label="Max Quantity",
-                    precision=0
-                )
+        with gr.Tab("📝 Add Drugs"):
+            with gr.Row():
+                with gr.Column(scale=1):
+                    name_input = gr.Textbox(
+                        label="Drug Name",
+                        placeholder="Enter drug name",
+                    )
+                    benefit_input = gr.Number(
+                        label="Benefit per Unit"
+                    )
+                    cost_input = gr.Number(
+                        label="Cost per Unit"
+                    )
+                    side_effect_input = gr.Number(
+                        label="Side Effect per Unit"
+                    )
+                    max_quantity_input = gr.Number(
+                        label="Max Quantity",
+                        precision=0
+                    )
                 
-                with gr.Row():
-                    add_btn = gr.Button("➕ Add Drug", variant="primary")
-                    clear_btn = gr.Button("🗑️ Clear All", variant="secondary")
+                    with gr.Row():
+                        add_btn = gr.Button("➕ Add Drug", variant="primary")
+                        clear_btn = gr.Button("🗑️ Clear All", variant="secondary")
             
-            with gr.Column(scale=2):
-                drugs_table = gr.Dataframe(
-                    headers=["Name", "Benefit", "Cost", "Side Effect", "Max Quantity"],
-                    label="Current Drugs",
-                    interactive=False
-                )
-    
-    with gr.Tab("🔍 Calculate Selection"):
-        with gr.Row():
-            with gr.Column(scale=1):
-                budget_input = gr.Number(
-                    label="Budget"
-                )
-                side_effect_limit_input = gr.Number(
-                    label="Side Effect Limit"
-                )
-                target_benefit_input = gr.Number(
-                    label="Target Benefit"
-                )
+                with gr.Column(scale=2):
+                    drugs_table = gr.Dataframe(
+                        headers=["Name", "Benefit", "Cost", "Side Effect", "Max Quantity"],
+                        label="Current Drugs",
+                        interactive=False
+                    )
+    
+        with gr.Tab("🔍 Calculate Selection"):
+            with gr.Row():
+                with gr.Column(scale=1):
+                    budget_input = gr.Number(
+                        label="Budget"
+                    )
+                    side_effect_limit_input = gr.Number(
+                        label="Side Effect Limit"
+                    )
+                    target_benefit_input = gr.Number(
+                        label="Target Benefit"
+                    )
                 
-                calc_btn = gr.Button("🎯 Calculate Optimal Selection", variant="primary", size="lg")
+                    exact_input = gr.Checkbox(
+                        label="Exact optimizer (slower, considers side effects when ranking)"
+                    )
+                    time_budget_input = gr.Number(
+                        label="Exact Time Budget (seconds)",
+                        value=DEFAULT_TIME_BUDGET
+                    )
+                
+                    calc_btn = gr.Button("🎯 Calculate Optimal Selection", variant="primary", size="lg")
             
-            with gr.Column(scale=2):
-                results_text = gr.Textbox(
-                    label="Results Summary",
-                    lines=6
-                )
-                results_table = gr.Dataframe(
-                    headers=["Drug", "Quantity"],
-                    label="Selected Drugs",
-                    interactive=False
-                )
-    
-    # Event handlers
-    add_btn.click(
-        drug_selector.add_drug,
-        inputs=[name_input, benefit_input, cost_input, side_effect_input, max_quantity_input],
-        outputs=[drugs_table, name_input, benefit_input, cost_input, side_effect_input, max_quantity_input]
-    )
-
+                with gr.Column(scale=2):
+                    results_text = gr.Textbox(
+                        label="Results Summary",
+                        lines=6
+                    )
+                    results_table = gr.Dataframe(
+                        headers=["Drug", "Quantity"],
+                        label="Selected Drugs",
+                        interactive=False
+                    )
     
-    clear_btn.click(
-        drug_selector.clear_drugs,
-        outputs=[drugs_table]
-    )
+        with gr.Tab("📈 Frontier"):
+            with gr.Row():
+                with gr.Column(scale=1):
+                    frontier_axis_input = gr.Radio(
+                        choices=["Budget", "Side Effect Limit"],
+                        value="Budget",
+                        label="Sweep"
+                    )
+                    sweep_to_input = gr.Number(
+                        label="Sweep Up To"
+                    )
+                    points_input = gr.Number(
+                        label="Points",
+                        value=50,
+                        precision=0
+                    )
+                    frontier_budget_input = gr.Number(
+                        label="Budget (when sweeping side effects)"
+                    )
+                    frontier_side_effect_input = gr.Number(
+                        label="Side Effect Limit (when sweeping budget)"
+                    )
+                    frontier_target_input = gr.Number(
+                        label="Target Benefit"
+                    )
+                    lookup_input = gr.Number(
+                        label="Look Up Limit"
+                    )
+                
+                    frontier_btn = gr.Button("📈 Sweep Frontier", variant="primary", size="lg")
+            
+                with gr.Column(scale=2):
+                    frontier_text = gr.Textbox(
+                        label="Frontier Summary",
+                        lines=6
+                    )
+                    frontier_plot = gr.LinePlot(
+                        label="Benefit Frontier"
+                    )
+                    frontier_table = gr.Dataframe(
+                        label="Frontier Points",
+                        interactive=False
+                    )
     
-    calc_btn.click(
-        drug_selector.calculate_selection,
-        inputs=[budget_input, side_effect_limit_input, target_benefit_input],
-        outputs=[results_text, results_table]
-    )
+        with gr.Tab("📦 Import / Export"):
+            with gr.Row():
+                with gr.Column(scale=1):
+                    import_file = gr.File(
+                        label="Formulary File (CSV, Parquet or Arrow)",
+                        file_types=[".csv", ".parquet", ".arrow", ".feather"],
+                        type="filepath"
+                    )
+                    import_btn = gr.Button("📥 Import Formulary", variant="primary")
+                
+                    export_format = gr.Radio(
+                        choices=["csv", "parquet", "arrow"],
+                        value="csv",
+                        label="Export Format"
+                    )
+                    export_btn = gr.Button("📤 Export Formulary", variant="secondary")
+                    export_file = gr.File(label="Exported Formulary")
+            
+                with gr.Column(scale=2):
+                    transfer_status = gr.Textbox(
+                        label="Import / Export Status",
+                        lines=6
+                    )
+    
+        session = gr.State()
+    
+        # Event handlers
+        session_event(
+            add_btn.click,
+            DrugSelector.add_drug,
+            session,
+            inputs=[name_input, benefit_input, cost_input, side_effect_input, max_quantity_input],
+            outputs=[drugs_table, name_input, benefit_input, cost_input, side_effect_input, max_quantity_input]
+        )
+    
+        session_event(
+            import_btn.click,
+            DrugSelector.import_drugs,
+            session,
+            inputs=[import_file],
+            outputs=[drugs_table, transfer_status]
+        )
+    
+        session_event(
+            export_btn.click,
+            DrugSelector.export_drugs,
+            session,
+            inputs=[export_format],
+            outputs=[export_file, transfer_status]
+        )
+    
+        session_event(
+            clear_btn.click,
+            DrugSelector.clear_drugs,
+            session,
+            outputs=[drugs_table]
+        )
+    
+        session_event(
+            calc_btn.click,
+            DrugSelector.calculate_selection,
+            session,
+            inputs=[budget_input, side_effect_limit_input, target_benefit_input, exact_input, time_budget_input],
+            outputs=[results_text, results_table]
+        )
+    
+        session_event(
+            frontier_btn.click,
+            DrugSelector.calculate_frontier,
+            session,
+            inputs=[frontier_axis_input, sweep_to_input, points_input, frontier_budget_input,
+                    frontier_side_effect_input, frontier_target_input, lookup_input],
+            outputs=[frontier_text, frontier_plot, frontier_table]
+        )
+    
+    return iface
 
 if __name__ == "__main__":
-    iface.launch()
\ No newline at end of file
+    build_interface().queue(default_concurrency_limit=QUEUE_CONCURRENCY).launch()
\ No newline at end of file
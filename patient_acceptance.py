@@ -0,0 +1,970 @@
+"""Patient acceptance solvers without any GUI dependency.
+
+``optimal_acceptance`` and its engines, the incremental solver, batch
+what-if curves and the multi-resource search only need NumPy, so batch
+workers can import this module without PyQt5.
+
+    python patient_acceptance.py patients.csv --total-resources 50
+    python patient_acceptance.py cohorts/ --curves --max-resources 200
+"""
+
+import argparse
+import csv
+import glob
+import heapq
+import math
+import multiprocessing
+import os
+import threading
+import time
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count, repeat
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+
+class PatientRegistry:
+    """Patients stored as ID, Recovery and Resources columns.
+
+    Appends extend ``array`` columns. Removing a patient only marks its slot;
+    marked slots are squeezed out once they outnumber live patients or when
+    the columns are read. A Fenwick tree counts the live slots, so appends,
+    removals and position lookups are all O(log n).
+    """
+
+    __slots__ = (
+        "ids",
+        "recovery",
+        "resources",
+        "next_id",
+        "_alive",
+        "_live",
+        "_slots",
+        "_dead",
+    )
+
+    def __init__(self):
+        self.ids = array("q")
+        self.recovery = array("q")
+        self.resources = array("q")
+        self.next_id = 1
+        self._alive = bytearray()
+        # Fenwick tree over _alive, 1-based
+        self._live = array("q", [0])
+        self._slots = {}
+        self._dead = 0
+
+    def __len__(self):
+        return len(self.ids) - self._dead
+
+    def append(self, recovery, resources, patient_id=None):
+        if patient_id is None or patient_id in self._slots:
+            patient_id = self.next_id
+        self.next_id = max(self.next_id, patient_id + 1)
+
+        self._slots[patient_id] = len(self.ids)
+        self.ids.append(patient_id)
+        self.recovery.append(recovery)
+        self.resources.append(resources)
+        self._alive.append(1)
+        slot = len(self.ids)
+        low = slot - (slot & -slot)
+        self._live.append(1 + self._live_before(slot - 1) - self._live_before(low))
+        return patient_id
+
+    def index(self, patient_id):
+        """Position of ``patient_id`` among the live patients."""
+        return self._live_before(self._slots[patient_id])
+
+    def remove(self, patient_id):
+        """Remove a patient and return the position it had."""
+        slot = self._slots.pop(patient_id)
+        position = self._live_before(slot)
+        self._alive[slot] = 0
+        slot += 1
+        while slot < len(self._live):
+            self._live[slot] -= 1
+            slot += slot & -slot
+        self._dead += 1
+        if self._dead > len(self):
+            self.compact()
+        return position
+
+    def clear(self):
+        self.__init__()
+
+    def compact(self):
+        if not self._dead:
+            return
+        alive = np.frombuffer(self._alive, dtype=bool)
+        for name in ("ids", "recovery", "resources"):
+            column = np.frombuffer(getattr(self, name), dtype=np.int64)[alive]
+            setattr(self, name, array("q", column.tobytes()))
+        self._alive = bytearray(b"\x01") * len(self.ids)
+        self._live = array("q", (slot & -slot for slot in range(len(self.ids) + 1)))
+        self._slots = {patient_id: i for i, patient_id in enumerate(self.ids)}
+        self._dead = 0
+
+    def _live_before(self, slot):
+        # Live patients in slots 0..slot-1
+        count = 0
+        while slot:
+            count += self._live[slot]
+            slot &= slot - 1
+        return count
+
+    def row(self, i):
+        self.compact()
+        return self.ids[i], self.recovery[i], self.resources[i]
+
+    def columns(self):
+        """Recovery and Resources as NumPy arrays, ready for the solvers."""
+        self.compact()
+        return (
+            np.array(self.recovery, dtype=np.int64),
+            np.array(self.resources, dtype=np.int64),
+        )
+
+    def load_csv(self, path):
+        """Append every row of an ID,Recovery,Resources CSV file.
+
+        Rows whose ID is missing or already taken get a fresh one. Returns
+        the number of patients added.
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            try:
+                rows = [
+                    (
+                        int(row["Recovery"]),
+                        int(row["Resources"]),
+                        int(row["ID"]) if row.get("ID") else None,
+                    )
+                    for row in reader
+                ]
+            except (KeyError, TypeError):
+                raise ValueError("CSV needs Recovery and Resources columns.")
+
+        for recovery, resources, patient_id in rows:
+            self.append(recovery, resources, patient_id)
+        return len(rows)
+
+    def save_csv(self, path):
+        self.compact()
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["ID", "Recovery", "Resources"])
+            writer.writerows(zip(self.ids, self.recovery, self.resources))
+
+
+def optimal_acceptance(
+    patient_data, total_resources, engine="python", include_matrix=False
+):
+    """Pick the patients maximizing total recovery within ``total_resources``.
+
+    ``engine="python"`` fills the full DP table and is kept as the reference
+    implementation. ``engine="numpy"`` gives the same acceptance and score
+    from a single rolling row, and ``engine="linear"`` gives the same score in
+    O(W) memory, possibly accepting a different but equally good set.
+    ``engine="pareto"`` tracks only reachable (resources, recovery) pairs,
+    which pays off when resources come in fine units, and ``engine="auto"``
+    picks between it and ``"numpy"``.
+    ``engine="parallel"`` spreads each row over all CPU cores.
+
+    The DP matrix is only dumped as text when ``include_matrix`` is set, and
+    only the python engine has the full table to dump.
+    """
+    try:
+        patient_recovery, patient_resources = patient_columns(patient_data)
+    except KeyError:
+        return "Error: Invalid input format."
+    # Registry patients are reported by ID, plain lists by position
+    ids = None
+    if isinstance(patient_data, PatientRegistry):
+        ids = patient_data.ids
+
+    if engine == "auto":
+        engine = choose_engine(patient_recovery, patient_resources, total_resources)
+
+    if engine == "python":
+        accepted, total_recovery, dp = python_acceptance(
+            list(patient_recovery), list(patient_resources), total_resources
+        )
+        dp_matrix = None
+        if include_matrix:
+            dp_matrix = "\n".join(["\t".join(map(str, row)) for row in dp])
+        return format_acceptance(accepted, total_recovery, dp_matrix, ids)
+    if engine == "numpy":
+        accepted, total_recovery = numpy_acceptance(
+            patient_recovery, patient_resources, total_resources
+        )
+        return format_acceptance(accepted, total_recovery, ids=ids)
+    if engine == "linear":
+        accepted, total_recovery = linear_memory_acceptance(
+            patient_recovery, patient_resources, total_resources
+        )
+        return format_acceptance(accepted, total_recovery, ids=ids)
+    if engine == "pareto":
+        accepted, total_recovery = pareto_acceptance(
+            patient_recovery, patient_resources, total_resources
+        )
+        return format_acceptance(accepted, total_recovery, ids=ids)
+    if engine == "parallel":
+        accepted, total_recovery = parallel_acceptance(
+            patient_recovery, patient_resources, total_resources
+        )
+        return format_acceptance(accepted, total_recovery, ids=ids)
+    return f"Error: Unknown engine '{engine}'."
+
+
+def patient_columns(patient_data):
+    """Recovery and Resources of a registry or a list of patient dicts."""
+    if isinstance(patient_data, PatientRegistry):
+        return patient_data.columns()
+    patient_recovery = [row["Recovery"] for row in patient_data]
+    patient_resources = [row["Resources"] for row in patient_data]
+    return patient_recovery, patient_resources
+
+
+def acceptance_curve(patient_data, max_resources):
+    """Best total recovery for every capacity 0..max_resources in one DP pass.
+
+    Entry ``c`` equals the Total Recovery Score ``optimal_acceptance`` reports
+    for ``total_resources=c``.
+    """
+    patient_recovery, patient_resources = patient_columns(patient_data)
+    return _acceptance_curve(patient_recovery, patient_resources, max_resources)
+
+
+def _acceptance_curve(patient_recovery, patient_resources, max_resources):
+    row = np.zeros(max_resources + 1, dtype=np.int64)
+    for recovery, resources in zip(patient_recovery, patient_resources):
+        knapsack_step(row, int(recovery), int(resources))
+    return row
+
+
+def batch_acceptance_curves(cohorts, max_resources, workers=None):
+    """Acceptance curves for many cohorts, spread over a process pool.
+
+    ``cohorts`` maps a cohort name to its patient data; the result maps the
+    same names to their curves.
+    """
+    columns = [patient_columns(patient_data) for patient_data in cohorts.values()]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        curves = pool.map(
+            _acceptance_curve,
+            [recovery for recovery, _ in columns],
+            [resources for _, resources in columns],
+            repeat(max_resources),
+        )
+        return dict(zip(cohorts, curves))
+
+
+def run_batch(paths, max_resources, output, workers=None):
+    """Headless what-if run: cohort CSV files in, one curve table out.
+
+    Each ``ID,Recovery,Resources`` CSV (or every CSV inside a directory) is a
+    cohort named after its file. ``output`` gets one
+    ``Cohort,Resources,Recovery`` row per cohort and capacity, as Parquet when
+    it ends in ``.parquet`` and CSV otherwise.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.csv"))))
+        else:
+            files.append(path)
+
+    cohorts = {}
+    for path in files:
+        cohort = PatientRegistry()
+        cohort.load_csv(path)
+        cohorts[os.path.splitext(os.path.basename(path))[0]] = cohort
+
+    curves = batch_acceptance_curves(cohorts, max_resources, workers)
+    capacities = np.arange(max_resources + 1)
+
+    if output.endswith(".parquet"):
+        import pandas as pd
+
+        pd.DataFrame(
+            {
+                "Cohort": np.repeat(list(curves), max_resources + 1),
+                "Resources": np.tile(capacities, len(curves)),
+                "Recovery": np.concatenate([*curves.values(), capacities[:0]]),
+            }
+        ).to_parquet(output, index=False)
+    else:
+        with open(output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Cohort", "Resources", "Recovery"])
+            for name, curve in curves.items():
+                writer.writerows(zip(repeat(name), capacities.tolist(), curve.tolist()))
+
+    return len(curves)
+
+
+def format_acceptance(accepted, total_recovery, dp_matrix=None, ids=None):
+    """Report text; patients are named by ``ids`` if given, else by position."""
+    labels = [ids[i] if ids is not None else i + 1 for i in accepted]
+    report = (
+        f"Accept patients: {', '.join(f'Patient {label}' for label in labels)}\n"
+        f"Total Recovery Score: {total_recovery}"
+    )
+    if dp_matrix is not None:
+        report += f"\n\nDP Matrix:\n{dp_matrix}"
+    return report
+
+
+def python_acceptance(patient_recovery, patient_resources, total_resources):
+    """Reference solver: returns (accepted indices, total recovery, dp table)."""
+    n = len(patient_recovery)
+
+    dp = [[0] * (total_resources + 1) for _ in range(n + 1)]
+
+    for i in range(1, n + 1):
+        for resources in range(1, total_resources + 1):
+            if resources >= patient_resources[i - 1]:
+                dp[i][resources] = max(
+                    dp[i - 1][resources],
+                    dp[i - 1][resources - patient_resources[i - 1]]
+                    + patient_recovery[i - 1],
+                )
+            else:
+                dp[i][resources] = dp[i - 1][resources]
+
+    accepted = []
+    resources = total_resources
+    for i in range(n, 0, -1):
+        if (
+            resources >= patient_resources[i - 1]
+            and dp[i][resources]
+            == dp[i - 1][resources - patient_resources[i - 1]] + patient_recovery[i - 1]
+        ):
+            accepted.append(i - 1)
+            resources -= patient_resources[i - 1]
+
+    accepted.reverse()
+
+    return accepted, dp[n][total_resources], dp
+
+
+def numpy_acceptance(patient_recovery, patient_resources, total_resources):
+    """Rolling-row solver: returns (accepted indices, total recovery).
+
+    Only one DP row is kept. Each patient's "take" decisions are packed eight
+    capacities per byte, so reconstruction needs n * (W + 1) / 8 bytes instead
+    of the full integer table.
+    """
+    recovery = np.asarray(patient_recovery, dtype=np.int64)
+    resources = np.asarray(patient_resources, dtype=np.int64)
+
+    row = np.zeros(total_resources + 1, dtype=np.int64)
+    take = np.zeros((len(recovery), (total_resources + 8) // 8), dtype=np.uint8)
+    for i in range(len(recovery)):
+        knapsack_step(row, int(recovery[i]), int(resources[i]), take[i])
+
+    accepted, _ = backtrack_take_bits(take, resources, total_resources)
+    return accepted, int(row[total_resources])
+
+
+def linear_memory_acceptance(
+    patient_recovery, patient_resources, total_resources, leaf_size=64
+):
+    """Divide-and-conquer solver: returns (accepted indices, total recovery).
+
+    Hirschberg's scheme: each range of patients is split in half, a forward
+    row over the left half and a second row over the right half give the
+    best recovery of each half at every capacity, and the capacity is split
+    where their sum peaks (the right half gets the larger share on ties).
+    Both rows are freed before recursing, so working memory is O(W): two
+    rows and the take bits of one ``leaf_size`` leaf, paid for with
+    O(n W log(n / leaf_size)) time. The total recovery always matches the
+    reference; among equally good sets it may accept a different one.
+    Patients needing no resources are left to ``numpy_acceptance``.
+    """
+    recovery = np.asarray(patient_recovery, dtype=np.int64)
+    resources = np.asarray(patient_resources, dtype=np.int64)
+
+    if np.any(resources == 0):
+        # The reference never updates column 0, which undercounts patients
+        # needing no resources in a way a split capacity can not reproduce
+        return numpy_acceptance(recovery, resources, total_resources)
+
+    accepted = []
+    _split_patient_range(
+        recovery,
+        resources,
+        0,
+        len(recovery),
+        total_resources,
+        max(leaf_size, 1),
+        accepted,
+    )
+    accepted.sort()
+    return accepted, int(recovery[accepted].sum())
+
+
+def _split_patient_range(recovery, resources, lo, hi, capacity, leaf_size, accepted):
+    # Appends the patients of lo..hi-1 accepted within ``capacity``.
+    if hi - lo <= leaf_size:
+        row = np.zeros(capacity + 1, dtype=np.int64)
+        take = np.zeros((hi - lo, (capacity + 8) // 8), dtype=np.uint8)
+        for i in range(lo, hi):
+            knapsack_step(row, int(recovery[i]), int(resources[i]), take[i - lo])
+        leaf_accepted, _ = backtrack_take_bits(take, resources[lo:hi], capacity)
+        accepted.extend(lo + i for i in leaf_accepted)
+        return
+
+    mid = (lo + hi) // 2
+    left = np.zeros(capacity + 1, dtype=np.int64)
+    for i in range(lo, mid):
+        knapsack_step(left, int(recovery[i]), int(resources[i]))
+    right = np.zeros(capacity + 1, dtype=np.int64)
+    for i in range(mid, hi):
+        knapsack_step(right, int(recovery[i]), int(resources[i]))
+    left += right[::-1]
+    split = int(np.argmax(left))
+    del left, right
+
+    _split_patient_range(recovery, resources, lo, mid, split, leaf_size, accepted)
+    _split_patient_range(
+        recovery, resources, mid, hi, capacity - split, leaf_size, accepted
+    )
+
+
+def pareto_acceptance(patient_recovery, patient_resources, total_resources):
+    """Sparse solver: returns (accepted indices, total recovery).
+
+    Each stage keeps only the non-dominated (resources used, recovery) pairs,
+    sorted by resources with strictly increasing recovery, so the work grows
+    with the frontier size instead of ``total_resources``. Every patient must
+    need at least one unit of resources, as the app enforces.
+    """
+    used = np.zeros(1, dtype=np.int64)
+    gained = np.zeros(1, dtype=np.int64)
+    frontiers = [(used, gained)]
+    for recovery, resources in zip(patient_recovery, patient_resources):
+        fits = used + resources <= total_resources
+        used = np.concatenate((used, used[fits] + resources))
+        gained = np.concatenate((gained, gained[fits] + recovery))
+
+        order = np.lexsort((-gained, used))
+        used, gained = used[order], gained[order]
+        dominated = np.zeros(len(used), dtype=bool)
+        dominated[1:] = gained[1:] <= np.maximum.accumulate(gained)[:-1]
+        used, gained = used[~dominated], gained[~dominated]
+        frontiers.append((used, gained))
+
+    def best(stage, capacity):
+        stage_used, stage_gained = frontiers[stage]
+        return int(stage_gained[np.searchsorted(stage_used, capacity, "right") - 1])
+
+    # Same backtrack as the reference, reading table cells off the frontiers
+    accepted = []
+    capacity = total_resources
+    for i in range(len(patient_recovery), 0, -1):
+        need = patient_resources[i - 1]
+        if capacity >= need and best(i, capacity) == (
+            best(i - 1, capacity - need) + patient_recovery[i - 1]
+        ):
+            accepted.append(i - 1)
+            capacity -= need
+    accepted.reverse()
+
+    return accepted, best(len(patient_recovery), total_resources)
+
+
+def parallel_acceptance(
+    patient_recovery, patient_resources, total_resources, workers=None
+):
+    """Multi-process solver: returns (accepted indices, total recovery).
+
+    The capacity axis is split into byte-aligned slices, one per worker
+    process. Two rolling DP rows and the packed take bits live in shared
+    memory, so nothing is pickled per row; workers meet at a barrier after
+    each patient.
+    """
+    recovery = np.asarray(patient_recovery, dtype=np.int64)
+    resources = np.asarray(patient_resources, dtype=np.int64)
+    n = len(recovery)
+    width = total_resources + 1
+    take_width = (width + 7) // 8
+    workers = max(1, min(workers or os.cpu_count() or 1, take_width))
+
+    shm = shared_memory.SharedMemory(create=True, size=2 * width * 8 + n * take_width)
+    rows = take = None
+    processes = []
+    try:
+        rows, take = _shared_arrays(shm, n, width)
+        rows[:] = 0
+
+        context = multiprocessing.get_context()
+        barrier = context.Barrier(workers)
+        finished = context.Array("b", workers, lock=False)
+        for k in range(workers):
+            lo = min(take_width * k // workers * 8, width)
+            hi = min(take_width * (k + 1) // workers * 8, width)
+            processes.append(
+                context.Process(
+                    target=_parallel_rows,
+                    args=(
+                        shm.name,
+                        n,
+                        width,
+                        recovery,
+                        resources,
+                        lo,
+                        hi,
+                        barrier,
+                        finished,
+                        k,
+                    ),
+                )
+            )
+        if n:
+            for process in processes:
+                process.start()
+            # A worker that dies mid-solve would leave the others waiting at
+            # the barrier forever, so break it as soon as one exits early.
+            pending = {process.sentinel: k for k, process in enumerate(processes)}
+            while pending:
+                for sentinel in connection.wait(list(pending)):
+                    k = pending.pop(sentinel)
+                    processes[k].join()
+                    if processes[k].exitcode != 0 or not finished[k]:
+                        barrier.abort()
+            if not all(finished):
+                raise RuntimeError("A parallel acceptance worker failed.")
+
+        accepted, _ = backtrack_take_bits(take, resources, total_resources)
+        total_recovery = int(rows[n % 2, total_resources])
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        del rows, take
+        shm.close()
+        shm.unlink()
+
+    return accepted, total_recovery
+
+
+def _shared_arrays(shm, n, width):
+    rows = np.ndarray((2, width), dtype=np.int64, buffer=shm.buf)
+    take = np.ndarray(
+        (n, (width + 7) // 8), dtype=np.uint8, buffer=shm.buf, offset=2 * width * 8
+    )
+    return rows, take
+
+
+def _parallel_rows(
+    shm_name, n, width, recovery, resources, lo, hi, barrier, finished, k
+):
+    # Worker body: fills capacities lo..hi-1 of every row, same cells as
+    # knapsack_step would.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    rows = take = prev = row = None
+    try:
+        rows, take = _shared_arrays(shm, n, width)
+        for i in range(n):
+            prev, row = rows[i % 2], rows[(i + 1) % 2]
+            need, gain = int(resources[i]), int(recovery[i])
+            start = min(max(need, 1, lo), hi)
+
+            row[lo:start] = prev[lo:start]
+            take_slice = np.zeros(hi - lo, dtype=bool)
+            if start < hi:
+                candidate = prev[start - need : hi - need] + gain
+                take_slice[start - lo :] = candidate >= prev[start:hi]
+                np.maximum(prev[start:hi], candidate, out=row[start:hi])
+            if lo == 0 and hi > 0:
+                take_slice[0] = need == 0 and gain == 0
+            take[i, lo // 8 : (hi + 7) // 8] = np.packbits(take_slice)
+
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                # Another worker failed; the parent reports it
+                return
+        finished[k] = 1
+    finally:
+        # Views into the block must go before it can be closed
+        del rows, take, prev, row
+        shm.close()
+
+
+def choose_engine(patient_recovery, patient_resources, total_resources):
+    """Pick ``"pareto"`` or ``"numpy"`` from a cheap bound on the frontier size.
+
+    Frontier entries have distinct resource totals, all multiples of the gcd
+    of the requirements, and distinct recovery totals, so either count bounds
+    it. Frontier merges cost several times a dense cell update.
+    """
+    recovery = np.asarray(patient_recovery, dtype=np.int64)
+    resources = np.asarray(patient_resources, dtype=np.int64)
+    if resources.size == 0 or resources.min() <= 0:
+        return "numpy"
+
+    step = int(np.gcd.reduce(resources))
+    frontier_bound = min(
+        total_resources // step + 1,
+        int(np.clip(recovery, 0, None).sum()) + 1,
+        2 ** min(len(resources), 62),
+    )
+    return "pareto" if frontier_bound * 8 < total_resources + 1 else "numpy"
+
+
+MultiResourceResult = namedtuple(
+    "MultiResourceResult",
+    ["accepted", "total_recovery", "upper_bound", "gap", "nodes", "status"],
+)
+
+
+def multi_resource_acceptance(
+    patient_recovery,
+    patient_resources,
+    capacities,
+    node_limit=100_000,
+    time_limit=None,
+):
+    """Acceptance when every patient needs several resources at once.
+
+    ``patient_resources`` has one row per patient and one column per resource
+    (beds, nurse-hours, ventilators, ...), ``capacities`` one limit per
+    column. Best-first branch-and-bound explores the patients; each node's
+    upper bound is the smallest LP-relaxation (fractional knapsack) bound over
+    every single resource and over their capacity-normalized sum. The search
+    stops after ``node_limit`` expanded nodes or ``time_limit`` seconds, and
+    the result reports the best acceptance found, the best open bound, the
+    relative gap between them and whether the answer is proven optimal.
+    """
+    started = time.perf_counter()
+    recovery = np.asarray(patient_recovery, dtype=np.float64)
+    capacities = np.asarray(capacities, dtype=np.float64)
+    needs = np.asarray(patient_resources, dtype=np.float64).reshape(
+        len(recovery), len(capacities)
+    )
+    integral = bool(np.all(recovery == np.floor(recovery)))
+
+    # Patients worth branching on: positive recovery and individually feasible
+    candidates = np.flatnonzero((recovery > 0) & np.all(needs <= capacities, axis=1))
+    scale = np.where(capacities > 0, capacities, 1.0)
+    surrogate = (needs[candidates] / scale).sum(axis=1)
+    density = recovery[candidates] / np.maximum(surrogate, 1e-12)
+    order = candidates[np.argsort(-density, kind="stable")]
+
+    values = recovery[order]
+    weights = np.column_stack([needs[order], needs[order] @ (1.0 / scale)])
+    limits = np.append(capacities, len(capacities))
+    # Per relaxation, the branching positions sorted by recovery per unit
+    relaxations = []
+    for d in range(weights.shape[1]):
+        by_ratio = np.argsort(-values / np.maximum(weights[:, d], 1e-12), kind="stable")
+        relaxations.append((by_ratio, weights[by_ratio, d], values[by_ratio]))
+
+    def upper_bound(level, used, value):
+        bound = value + values[level:].sum()
+        for d, (by_ratio, dim_weights, dim_values) in enumerate(relaxations):
+            free = by_ratio >= level
+            dim_weights, dim_values = dim_weights[free], dim_values[free]
+            filled = np.cumsum(dim_weights)
+            room = limits[d] - used[d]
+            whole = int(np.searchsorted(filled, room, "right"))
+            relaxed = dim_values[:whole].sum()
+            if whole < len(dim_weights):
+                spare = room - (filled[whole - 1] if whole else 0.0)
+                relaxed += dim_values[whole] * spare / dim_weights[whole]
+            bound = min(bound, value + relaxed)
+        return math.floor(bound + 1e-9) if integral else bound
+
+    # Greedy incumbent in branching order
+    used = np.zeros(len(limits))
+    best_value, best_taken = 0.0, 0
+    for position in range(len(order)):
+        if np.all(used + weights[position] <= limits + 1e-9):
+            used += weights[position]
+            best_value += values[position]
+            best_taken |= 1 << position
+
+    counter = count()
+    root = np.zeros(len(limits))
+    heap = [(-upper_bound(0, root, 0.0), next(counter), 0, 0.0, root, 0)]
+    nodes = 0
+    status = "optimal"
+    while heap:
+        if -heap[0][0] <= best_value:
+            heap = []
+            break
+        if nodes >= node_limit:
+            status = "node limit"
+            break
+        if time_limit is not None and time.perf_counter() - started >= time_limit:
+            status = "time limit"
+            break
+
+        _, _, level, value, used, taken = heapq.heappop(heap)
+        nodes += 1
+        if level == len(order):
+            continue
+
+        children = [(value, used, taken)]
+        with_patient = used + weights[level]
+        if np.all(with_patient <= limits + 1e-9):
+            children.append((value + values[level], with_patient, taken | 1 << level))
+        for child_value, child_used, child_taken in children:
+            if child_value > best_value:
+                best_value, best_taken = child_value, child_taken
+            bound = upper_bound(level + 1, child_used, child_value)
+            if bound > best_value:
+                heapq.heappush(
+                    heap,
+                    (
+                        -bound,
+                        next(counter),
+                        level + 1,
+                        child_value,
+                        child_used,
+                        child_taken,
+                    ),
+                )
+
+    best_bound = max(best_value, -heap[0][0]) if heap else best_value
+    accepted = sorted(
+        int(order[position])
+        for position in range(len(order))
+        if best_taken >> position & 1
+    )
+    gap = float((best_bound - best_value) / best_bound) if best_bound > 0 else 0.0
+    if integral:
+        best_value, best_bound = int(best_value), int(best_bound)
+    return MultiResourceResult(accepted, best_value, best_bound, gap, nodes, status)
+
+
+def knapsack_step(row, recovery, resources, take_row=None):
+    """Advance ``row`` by one patient in place, like one row of the full table.
+
+    Column 0 is never updated, matching the reference loop. When ``take_row``
+    is given, the packed bits record where taking the patient is optimal,
+    using the same tie-breaking as the reference backtrack.
+    """
+    width = len(row)
+    start = max(resources, 1)
+    take = np.zeros(width, dtype=bool) if take_row is not None else None
+
+    if start < width:
+        candidate = row[start - resources : width - resources] + recovery
+        if take is not None:
+            take[start:] = candidate >= row[start:]
+        np.maximum(row[start:], candidate, out=row[start:])
+
+    if take is not None:
+        take[0] = resources == 0 and recovery == 0
+        take_row[:] = np.packbits(take)
+
+
+def backtrack_take_bits(take, patient_resources, capacity):
+    accepted = []
+    for i in range(len(take) - 1, -1, -1):
+        if take[i, capacity >> 3] >> (7 - (capacity & 7)) & 1:
+            accepted.append(i)
+            capacity -= int(patient_resources[i])
+    accepted.reverse()
+    return accepted, capacity
+
+
+class IncrementalAcceptanceSolver:
+    """DP table that grows by one row per patient of a ``PatientRegistry``.
+
+    Rows span every capacity up to ``max_resources``, so any capacity in that
+    range is answered from the rows already built. Patients are read from the
+    registry columns and their rows are appended on the next query. Queries
+    may run on a worker thread, so the registry is changed through the
+    solver or under ``lock``; the lock is only held one row at a time so
+    edits from the GUI thread never wait for a whole solve.
+    """
+
+    def __init__(self, max_resources, registry=None):
+        self.max_resources = max_resources
+        self.registry = PatientRegistry() if registry is None else registry
+        self.rows = [np.zeros(max_resources + 1, dtype=np.int64)]
+        self.lock = threading.RLock()
+
+    def add_patient(self, recovery, resources, patient_id=None):
+        with self.lock:
+            return self.registry.append(int(recovery), int(resources), patient_id)
+
+    def add_patients(self, recovery, resources):
+        with self.lock:
+            for patient in zip(recovery, resources):
+                self.registry.append(*map(int, patient))
+
+    def load_csv(self, path):
+        with self.lock:
+            return self.registry.load_csv(path)
+
+    def remove_patient(self, patient_id):
+        """Remove a patient and return the position it had."""
+        # Rows up to the removed patient stay valid; later ones are rebuilt.
+        with self.lock:
+            position = self.registry.remove(patient_id)
+            del self.rows[position + 1 :]
+            return position
+
+    def reset(self):
+        with self.lock:
+            self.registry.clear()
+            del self.rows[1:]
+
+    def set_max_resources(self, max_resources):
+        # Cells at capacity c only depend on capacities <= c, so shrinking
+        # keeps every row; growing needs wider rows and starts over.
+        with self.lock:
+            if max_resources <= self.max_resources:
+                self.rows = [row[: max_resources + 1] for row in self.rows]
+            else:
+                self.rows = [np.zeros(max_resources + 1, dtype=np.int64)]
+            self.max_resources = max_resources
+
+    def update(self, progress=None, cancelled=None):
+        """Build missing rows; returns False if ``cancelled()`` stopped it.
+
+        ``progress(done, total)`` is called after each new row. Rows built
+        before a cancel are kept for the next query.
+        """
+        done = 0
+        while True:
+            if cancelled is not None and cancelled():
+                return False
+            with self.lock:
+                i = len(self.rows) - 1
+                if i >= len(self.registry):
+                    return True
+                total = done + len(self.registry) - i
+                _, recovery, resources = self.registry.row(i)
+                row = self.rows[-1].copy()
+                knapsack_step(row, recovery, resources)
+                self.rows.append(row)
+            done += 1
+            if progress is not None:
+                progress(done, total)
+
+    def solve(self, total_resources, progress=None, cancelled=None):
+        """Return (accepted indices, total recovery), or None if cancelled."""
+        result = self._query(total_resources, False, progress, cancelled)
+        if result is None:
+            return None
+        return result[:2]
+
+    def report(
+        self, total_resources, include_matrix=False, progress=None, cancelled=None
+    ):
+        """Same text as ``optimal_acceptance``, or None if cancelled."""
+        result = self._query(total_resources, include_matrix, progress, cancelled)
+        if result is None:
+            return None
+        accepted, total_recovery, dp_matrix, ids = result
+        return format_acceptance(accepted, total_recovery, dp_matrix, ids)
+
+    def cell(self, i, resources):
+        """Table cell for the first ``i`` patients, or None if not built yet."""
+        rows = self.rows
+        if i < len(rows) and resources < len(rows[i]):
+            return int(rows[i][resources])
+        return None
+
+    def sample(self, row_count, total_resources, max_size):
+        """Evenly spaced grid of at most ``max_size`` x ``max_size`` cells."""
+        with self.lock:
+            row_count = min(row_count, len(self.rows))
+            total_resources = min(total_resources, self.max_resources)
+            picked_rows = np.linspace(0, row_count - 1, min(row_count, max_size))
+            picked_columns = np.linspace(
+                0, total_resources, min(total_resources + 1, max_size)
+            )
+            columns = picked_columns.astype(np.int64)
+            return np.stack(
+                [self.rows[i][columns] for i in picked_rows.astype(np.int64)]
+            )
+
+    def _query(self, total_resources, with_matrix, progress, cancelled):
+        if total_resources > self.max_resources:
+            self.set_max_resources(total_resources)
+
+        while True:
+            if not self.update(progress, cancelled):
+                return None
+            with self.lock:
+                # Patients added since update() returned need their rows too
+                if len(self.rows) > len(self.registry):
+                    return self._backtrack(total_resources, with_matrix)
+
+    def _backtrack(self, total_resources, with_matrix):
+        rows = self.rows
+        recovery, patient_resources = self.registry.columns()
+        recovery, patient_resources = recovery.tolist(), patient_resources.tolist()
+        accepted = []
+        resources = total_resources
+        for i in range(len(recovery), 0, -1):
+            need = patient_resources[i - 1]
+            if (
+                resources >= need
+                and rows[i][resources]
+                == rows[i - 1][resources - need] + recovery[i - 1]
+            ):
+                accepted.append(i - 1)
+                resources -= need
+        accepted.reverse()
+
+        dp_matrix = None
+        if with_matrix:
+            dp_matrix = "\n".join(
+                [
+                    "\t".join(map(str, row[: total_resources + 1].tolist()))
+                    for row in rows
+                ]
+            )
+        return accepted, int(rows[-1][total_resources]), dp_matrix, self.registry.ids[:]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Patient acceptance optimization")
+    parser.add_argument(
+        "patients",
+        nargs="+",
+        metavar="PATH",
+        help="ID,Recovery,Resources CSV files (or directories with --curves)",
+    )
+    parser.add_argument("--total-resources", type=int, default=50)
+    parser.add_argument(
+        "--engine",
+        default="auto",
+        choices=["python", "numpy", "linear", "pareto", "auto", "parallel"],
+    )
+    parser.add_argument(
+        "--curves",
+        action="store_true",
+        help="write acceptance curves for every cohort instead of one solve",
+    )
+    parser.add_argument("--max-resources", type=int, default=50)
+    parser.add_argument("--output", default="acceptance_curves.csv")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    if args.curves:
+        count = run_batch(args.patients, args.max_resources, args.output, args.workers)
+        print(f"Wrote acceptance curves for {count} cohorts to {args.output}")
+        return
+
+    patients = PatientRegistry()
+    for path in args.patients:
+        patients.load_csv(path)
+    print(optimal_acceptance(patients, args.total_resources, engine=args.engine))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""The patient acceptance engines against the reference DP table."""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import patient_acceptance  # noqa: E402
+
+
+def random_cohorts(seed, count=40, max_patients=24, min_resources=0):
+    rng = random.Random(seed)
+    cohorts = [([], [], 10), ([5], [max(min_resources, 0)], 0), ([7], [3], 2)]
+    for _ in range(count):
+        n = rng.randint(1, max_patients)
+        total_resources = rng.randint(0, 80)
+        recovery = [rng.randint(0, 20) for _ in range(n)]
+        # Many ties and exact fits, which is where backtracks tend to diverge
+        resources = [rng.randint(min_resources, 30) for _ in range(n)]
+        cohorts.append((recovery, resources, total_resources))
+    return cohorts
+
+
+def reference(recovery, resources, total_resources):
+    accepted, total_recovery, _ = patient_acceptance.python_acceptance(
+        recovery, resources, total_resources
+    )
+    return accepted, total_recovery
+
+
+def test_numpy_matches_python():
+    for cohort in random_cohorts(1):
+        assert patient_acceptance.numpy_acceptance(*cohort) == reference(*cohort)
+
+
+@pytest.mark.parametrize("leaf_size", [1, 2, 5, 64])
+def test_linear_matches_python_total(leaf_size):
+    for recovery, resources, total_resources in random_cohorts(leaf_size):
+        accepted, total_recovery = patient_acceptance.linear_memory_acceptance(
+            recovery, resources, total_resources, leaf_size=leaf_size
+        )
+        # Equally good sets may differ, so check the total and feasibility
+        assert total_recovery == reference(recovery, resources, total_resources)[1]
+        assert accepted == sorted(set(accepted))
+        assert sum(resources[i] for i in accepted) <= total_resources
+        assert sum(recovery[i] for i in accepted) == total_recovery
+
+
+def test_pareto_matches_python():
+    for cohort in random_cohorts(3, min_resources=1):
+        assert patient_acceptance.pareto_acceptance(*cohort) == reference(*cohort)
+
+
+def test_pareto_matches_python_on_fine_units():
+    rng = random.Random(4)
+    for _ in range(10):
+        n = rng.randint(1, 12)
+        recovery = [rng.randint(0, 50) for _ in range(n)]
+        resources = [rng.randint(1, 2000) for _ in range(n)]
+        cohort = (recovery, resources, rng.randint(0, 5000))
+        assert patient_acceptance.pareto_acceptance(*cohort) == reference(*cohort)
+
+
+def test_auto_engine_matches_python():
+    cohorts = random_cohorts(5) + [([9, 4, 7], [1000, 1500, 2000], 3000)]
+    for recovery, resources, total_resources in cohorts:
+        engine = patient_acceptance.choose_engine(recovery, resources, total_resources)
+        assert engine in ("numpy", "pareto")
+        if engine == "pareto":
+            assert min(resources) >= 1
+        patients = [
+            {"Recovery": gain, "Resources": need}
+            for gain, need in zip(recovery, resources)
+        ]
+        assert patient_acceptance.optimal_acceptance(
+            patients, total_resources, engine="auto"
+        ) == patient_acceptance.optimal_acceptance(patients, total_resources)
+
+
+def test_choose_engine_picks_pareto_for_coarse_frontiers():
+    assert (
+        patient_acceptance.choose_engine([9, 4, 7], [1000, 1500, 2000], 3000)
+        == "pareto"
+    )
+    assert patient_acceptance.choose_engine([9, 4], [0, 3], 3000) == "numpy"
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_matches_python(workers):
+    # Each call starts worker processes, so keep the cohorts few and small
+    for cohort in random_cohorts(6 + workers, count=4, max_patients=10):
+        assert patient_acceptance.parallel_acceptance(
+            *cohort, workers=workers
+        ) == reference(*cohort)
+
+
+def test_incremental_remove_matches_python():
+    rng = random.Random(7)
+    solver = patient_acceptance.IncrementalAcceptanceSolver(60)
+    for _ in range(30):
+        solver.add_patient(rng.randint(0, 20), rng.randint(0, 30))
+    for _ in range(25):
+        if len(solver.registry) and rng.random() < 0.4:
+            solver.remove_patient(rng.choice(list(solver.registry.ids)))
+        else:
+            solver.add_patient(rng.randint(0, 20), rng.randint(0, 30))
+        total_resources = rng.randint(0, 60)
+        recovery, resources = solver.registry.columns()
+        assert solver.solve(total_resources) == reference(
+            recovery.tolist(), resources.tolist(), total_resources
+        )
+
+
+def test_incremental_shrink_and_grow_match_python():
+    rng = random.Random(8)
+    solver = patient_acceptance.IncrementalAcceptanceSolver(80)
+    solver.add_patients(
+        [rng.randint(0, 20) for _ in range(20)],
+        [rng.randint(1, 30) for _ in range(20)],
+    )
+    recovery, resources = (column.tolist() for column in solver.registry.columns())
+    for max_resources in [80, 35, 10, 0, 50, 120]:
+        solver.set_max_resources(max_resources)
+        for total_resources in {0, max_resources // 2, max_resources}:
+            assert solver.solve(total_resources) == reference(
+                recovery, resources, total_resources
+            )
+
+
+def test_registry_positions_survive_removal():
+    registry = patient_acceptance.PatientRegistry()
+    ids = [registry.append(i, i + 1) for i in range(20)]
+    rng = random.Random(9)
+    for patient_id in rng.sample(ids, 15):
+        ids.remove(patient_id)
+        registry.remove(patient_id)
+        for position, remaining in enumerate(ids):
+            assert registry.index(remaining) == position
+    assert list(registry.columns()[0]) == [registry.row(i)[1] for i in range(5)]
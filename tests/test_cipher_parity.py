@@ -0,0 +1,67 @@
+"""The vectorised cipher against the original recursive one."""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "Divide_and_Conquer",
+    ),
+)
+
+import patient_cipher  # noqa: E402
+
+ALPHABET = [chr(i) for i in range(600)] + ["é", "ü", "中", "😀"]
+
+
+def random_messages(seed, depth=3, count=60, max_length=400):
+    # The reference shifts every leaf depth times in Python, so keep deep runs short
+    if depth > 10:
+        count, max_length = 8, 100
+    rng = random.Random(seed)
+    lengths = [0, 1, 2] + [rng.randint(0, max_length) for _ in range(count)]
+    return ["".join(rng.choice(ALPHABET) for _ in range(n)) for n in lengths]
+
+
+@pytest.fixture(params=[1, 2, 5, 7, 16])
+def min_chunk(request, monkeypatch):
+    monkeypatch.setattr(patient_cipher, "min_chunk_size", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("depth", [2, 3, 5, 300])
+def test_encrypt_matches_recursive(min_chunk, depth):
+    for message in random_messages(depth * 100 + min_chunk, depth):
+        expected = patient_cipher.recursive_encrypt(message, depth)
+        assert patient_cipher.divide_and_conquer_encrypt(message, depth) == expected
+
+
+@pytest.mark.parametrize("depth", [2, 3, 5, 300])
+def test_decrypt_matches_recursive(min_chunk, depth):
+    for message in random_messages(depth * 100 + min_chunk + 1, depth):
+        ciphertext = patient_cipher.recursive_encrypt(message, depth)
+        expected = patient_cipher.recursive_decrypt(ciphertext, depth)
+        assert patient_cipher.divide_and_conquer_decrypt(ciphertext, depth) == expected
+
+
+@pytest.mark.parametrize("index", [1, 4])
+def test_shift_index_matches_recursive(min_chunk, index):
+    for message in random_messages(index, count=20):
+        expected = patient_cipher.recursive_encrypt(message, 3, index)
+        assert patient_cipher.divide_and_conquer_encrypt(message, 3, index) == expected
+
+
+def test_block_shifts_match_whole_message(min_chunk):
+    rng = random.Random(min_chunk)
+    for _ in range(40):
+        length = rng.randint(1, 2000)
+        whole = patient_cipher.shift_vector(length, min_chunk, 3)
+        start = rng.randint(0, length - 1)
+        stop = rng.randint(start + 1, length)
+        blocks = patient_cipher.block_shifts(length, start, stop, 3)
+        assert blocks.tolist() == whole[start:stop].tolist()
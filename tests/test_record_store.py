@@ -0,0 +1,127 @@
+"""Record text escaping and RecordStore crash recovery."""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "Divide_and_Conquer",
+    ),
+)
+
+import patient_cipher  # noqa: E402
+
+AWKWARD = [";", "\\", "; ", "\\;", ";\\", "\\\\;", "Age: 3; Gender: x", "a\nb", ""]
+
+
+def random_records(seed, count=200):
+    rng = random.Random(seed)
+    pieces = AWKWARD + ["Ann", "12", "é", "中", " ", ":"]
+    return [
+        patient_cipher.PatientRecord(
+            *(
+                "".join(rng.choice(pieces) for _ in range(rng.randint(0, 5)))
+                for _ in patient_cipher.PatientRecord._fields
+            )
+        )
+        for _ in range(count)
+    ]
+
+
+def test_escaped_records_round_trip():
+    for record in random_records(1):
+        text = patient_cipher.serialize_record(record)
+        assert patient_cipher.parse_record(text) == record
+
+
+def test_escaped_values_never_split_fields():
+    record = patient_cipher.PatientRecord(*AWKWARD)
+    text = patient_cipher.serialize_record(record)
+    assert patient_cipher.parse_record(text) == record
+    assert patient_cipher.parse_record(text + ";") is None
+
+
+def test_legacy_records_still_parse():
+    record = patient_cipher.PatientRecord(
+        "Ann", "41", "F", "1 Main St", "555", "Bob", "None", "asthma", "flu"
+    )
+    text = patient_cipher.serialize_record(record, escaped=False)
+    assert patient_cipher.parse_record(text, escaped=False) == record
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    return str(tmp_path / "store")
+
+
+def fill_store(directory, count, segment_bytes=64 << 20):
+    store = patient_cipher.RecordStore(directory, segment_bytes=segment_bytes)
+    payloads = [os.urandom(random.Random(i).randint(1, 300)) for i in range(count)]
+    ids = [store.append(data, timestamp=float(i)) for i, data in enumerate(payloads)]
+    store.close()
+    return dict(zip(ids, payloads))
+
+
+def last_segment(directory):
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".log"))
+    return os.path.join(directory, names[-1])
+
+
+@pytest.mark.parametrize("cut", [1, 5, 20, 40])
+def test_torn_tail_is_dropped(store_dir, cut):
+    records = fill_store(store_dir, 30)
+    with open(last_segment(store_dir), "r+b") as f:
+        f.truncate(os.path.getsize(f.name) - cut)
+
+    store = patient_cipher.RecordStore(store_dir)
+    last_id = max(records)
+    assert last_id not in store.offsets
+    for record_id in store.ids():
+        assert store.get(record_id) == records[record_id]
+    # The next append reuses the dropped ID and lands after the good prefix
+    assert store.append(b"after crash") == last_id
+    store.close()
+
+    reopened = patient_cipher.RecordStore(store_dir, read_only=True)
+    assert reopened.get(last_id) == b"after crash"
+    assert len(reopened) == len(records)
+    reopened.close()
+
+
+def test_corrupt_unindexed_tail_is_dropped(store_dir):
+    records = fill_store(store_dir, 10)
+    # Records past the index are re-read on open, so their CRC is checked
+    entry_size = patient_cipher.RecordStore.INDEX_ENTRY.size
+    with open(os.path.join(store_dir, "index.bin"), "r+b") as f:
+        f.truncate(7 * entry_size)
+    with open(last_segment(store_dir), "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last_byte = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last_byte[0] ^ 0xFF]))
+
+    store = patient_cipher.RecordStore(store_dir)
+    assert store.ids() == sorted(records)[:-1]
+    store.close()
+
+
+def test_unindexed_records_are_recovered(store_dir):
+    records = fill_store(store_dir, 25, segment_bytes=2000)
+    index_path = os.path.join(store_dir, "index.bin")
+    entry_size = patient_cipher.RecordStore.INDEX_ENTRY.size
+    # Keep half the index plus a torn entry
+    with open(index_path, "r+b") as f:
+        f.truncate(12 * entry_size + entry_size // 2)
+
+    store = patient_cipher.RecordStore(store_dir)
+    assert store.ids() == sorted(records)
+    for record_id, data in records.items():
+        assert store.get(record_id) == data
+    assert store.between(5.0, 9.0) == sorted(records)[5:10]
+    store.close()
+    assert os.path.getsize(index_path) == len(records) * entry_size